@@ -29,6 +29,7 @@ import os
 import math
 import Draft
 from lasercut.helper import biggest_area_faces
+from lasercut.makehinges import PATTERN_PROPERTY
 
 __dir__ = os.path.dirname(__file__)
 iconPath = os.path.join(__dir__, 'icons')
@@ -44,8 +45,20 @@ def get_freecad_object():
     return obj_list
 
 
+# 2D pattern computed with the part (living hinges), None if the part has to be projected
+def get_pattern(part_feature):
+    pattern = getattr(part_feature, PATTERN_PROPERTY, None)
+    if pattern is None or pattern.isNull():
+        return None
+    return pattern
+
+
 def transform_shape(part_feature, new_part_feature, freecad_document):
-    new_part_feature.Shape = part_feature.Shape.removeSplitter()
+    pattern = get_pattern(part_feature)
+    if pattern is not None:
+        new_part_feature.Shape = pattern.copy()
+    else:
+        new_part_feature.Shape = part_feature.Shape.removeSplitter()
     freecad_document.recompute()
     normal_face_prop = biggest_area_faces(part_feature.Shape)
     normal_ref = normal_face_prop[0]
@@ -85,6 +98,7 @@ class ExportCommand:
         max_line_y = 0
         z_fix = 30
         new_parts_list = []
+        parts_to_project = []
         per_line = int(math.sqrt(len(parts_list)))
         for i in range(len(parts_list)):
             part = parts_list[i]
@@ -106,8 +120,10 @@ class ExportCommand:
                 x_pos = 0
 
             new_parts_list.append(new_part)
+            if get_pattern(part) is None:
+                parts_to_project.append(new_part)
 
-        for tmppart in new_parts_list:
+        for tmppart in parts_to_project:
             Draft.makeShape2DView(tmppart)
 
         freecad_document.recompute()
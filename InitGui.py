@@ -56,11 +56,12 @@ static char * laser_xpm[] = {
         import ExportPanel
         import MakeBoxPanel
         import MakeRoundedBoxPanel
-        from panel import multiplejoins, crosspiece, livinghinge
+        from panel import multiplejoins, crosspiece, livinghinge, resultcache
         all_command = ["make_box_command", "multiple_tabs_command", "crosspiece"]
         self.appendToolbar("Tab", all_command)
         self.appendToolbar("Hinge", ["make_rounded_box_command", "livinghinge"])
         self.appendToolbar("Export", ["export_command"])
+        self.appendMenu("LCInterlocking", ["result_cache_stats_command", "result_cache_clear_command"])
 
  
     def Activated(self):
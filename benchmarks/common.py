@@ -0,0 +1,163 @@
+#!/usr/bin/env python
+
+# ***************************************************************************
+# *                                                                         *
+# *   Copyright (c) 2016 execuc                                             *
+# *                                                                         *
+# *   This file is part of LCInterlocking module.                           *
+# *   LCInterlocking module is free software; you can redistribute it and/or*
+# *   modify it under the terms of the GNU Lesser General Public            *
+# *   License as published by the Free Software Foundation; either          *
+# *   version 2.1 of the License, or (at your option) any later version.    *
+# *                                                                         *
+# *   This module is distributed in the hope that it will be useful,       *
+# *   but WITHOUT ANY WARRANTY; without even the implied warranty of        *
+# *   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU     *
+# *   Lesser General Public License for more details.                       *
+# *                                                                         *
+# *   You should have received a copy of the GNU Lesser General Public      *
+# *   License along with this library; if not, write to the Free Software   *
+# *   Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston,            *
+# *   MA  02110-1301  USA                                                   *
+# *                                                                         *
+# ***************************************************************************
+
+
+# Shared helpers of the benchmarks. Benchmarks are run without GUI, either with FreeCADCmd :
+#   FreeCADCmd benchmarks/get_shape.py
+#   FreeCADCmd benchmarks/suite.py
+# or with a python interpreter able to import the FreeCAD library.
+
+import os
+import sys
+import json
+import time
+import importlib
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TEST_DIR = os.path.join(ROOT_DIR, "test")
+if ROOT_DIR not in sys.path:
+    sys.path.insert(0, ROOT_DIR)
+
+import FreeCAD
+from lasercut import helper
+from lasercut.material import MaterialProperties
+from lasercut.tabproperties import TabProperties
+
+
+def open_document(file_name):
+    return FreeCAD.openDocument(os.path.join(TEST_DIR, file_name))
+
+
+# Solid objects which are not used by another object of the document
+def get_solid_objects(document):
+    objects = []
+    for obj in document.Objects:
+        if hasattr(obj, "Shape") and len(obj.Shape.Solids) > 0 and len(obj.InList) == 0:
+            objects.append(obj)
+    return objects
+
+
+def make_parts_properties(objects):
+    parts = []
+    for obj in objects:
+        part = MaterialProperties(type=MaterialProperties.TYPE_LASER_CUT, name=obj.Name, label=obj.Label,
+                                  freecad_object=obj)
+        part.recomputeInit(obj)
+        parts.append(part)
+    return parts
+
+
+# A face of a part receives tabs if it is a side face (not parallel to the part sheet) and if
+# another part lies just behind it.
+def make_auto_tabs(objects, tab_type=TabProperties.TYPE_TAB, tabs_number=1, tabs_width=10.):
+    tabs = []
+    linked_pairs = set()
+    for obj in objects:
+        sheet_normal = helper.biggest_area_faces(obj.Shape)[0]
+        for index, face in enumerate(obj.Shape.Faces):
+            if len(face.Edges) != 4:
+                continue
+            normal = face.normalAt(0, 0)
+            if helper.compare_freecad_vector_direction(normal, sheet_normal):
+                continue
+            point = face.CenterOfMass + normal.normalize() * 0.01
+            for other in objects:
+                if other is obj or (other.Name, obj.Name) in linked_pairs:
+                    continue
+                if other.Shape.isInside(point, 10e-6, False):
+                    face_name = "Face%d" % (index + 1)
+                    tab = TabProperties(freecad_face=face, freecad_obj_name=obj.Name, face_name=face_name,
+                                        tab_type=tab_type, tabs_number=tabs_number,
+                                        tabs_width=min(tabs_width, face.Length / 8.0))
+                    tab.recomputeInit(obj, face)
+                    tabs.append(tab)
+                    linked_pairs.add((obj.Name, other.Name))
+                    break
+    return tabs
+
+
+# Add the shapes of a generator (list of {'shape', 'name'}) to the document, with a prefix to
+# tell the assemblies apart
+def add_shapes(document, part_list, prefix="", offset=None):
+    objects = []
+    for part in part_list:
+        shape = part['shape'].copy()
+        if offset is not None:
+            shape.translate(offset)
+        obj = document.addObject("Part::Feature", prefix + part['name'])
+        obj.Shape = shape
+        objects.append(obj)
+    document.recompute()
+    return objects
+
+
+# Peak resident memory of the process in kilobytes, None where it is not available. It is the peak
+# of the whole life of the process, benchmarks reporting it are run with run_isolated.
+def peak_memory():
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform == "darwin":
+        peak //= 1024
+    return peak
+
+
+# Runs a benchmark function, named "module.function" and returning a dictionary, in its own
+# FreeCADCmd process so that its peak memory is not the one of the previous benchmarks. Without
+# FreeCADCmd, it is run in this process and its peak memory is not reported.
+def run_isolated(function_name, **arguments):
+    from lasercut import workerpool
+    if workerpool.is_available():
+        return workerpool.run_jobs_or_raise([(function_name, arguments)], 1, 0)[0]
+    module_name, name = function_name.rsplit(".", 1)
+    result = getattr(importlib.import_module(module_name), name)(**arguments)
+    result['peak_memory_kb'] = None
+    return result
+
+
+def measure(function, repeat=5):
+    durations = []
+    result = None
+    for i in range(repeat):
+        start = time.perf_counter()
+        result = function()
+        durations.append(time.perf_counter() - start)
+    return durations, result
+
+
+def percentile(values, ratio):
+    values = sorted(values)
+    index = min(len(values) - 1, int(round(ratio * (len(values) - 1))))
+    return values[index]
+
+
+def summary(durations):
+    return {'median': percentile(durations, 0.5), 'p95': percentile(durations, 0.95),
+            'min': min(durations), 'max': max(durations), 'runs': len(durations)}
+
+
+def print_report(report):
+    print(json.dumps(report, indent=2, sort_keys=True))
@@ -0,0 +1,77 @@
+#!/usr/bin/env python
+
+# ***************************************************************************
+# *                                                                         *
+# *   Copyright (c) 2016 execuc                                             *
+# *                                                                         *
+# *   This file is part of LCInterlocking module.                           *
+# *   LCInterlocking module is free software; you can redistribute it and/or*
+# *   modify it under the terms of the GNU Lesser General Public            *
+# *   License as published by the Free Software Foundation; either          *
+# *   version 2.1 of the License, or (at your option) any later version.    *
+# *                                                                         *
+# *   This module is distributed in the hope that it will be useful,       *
+# *   but WITHOUT ANY WARRANTY; without even the implied warranty of        *
+# *   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU     *
+# *   Lesser General Public License for more details.                       *
+# *                                                                         *
+# *   You should have received a copy of the GNU Lesser General Public      *
+# *   License along with this library; if not, write to the Free Software   *
+# *   Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston,            *
+# *   MA  02110-1301  USA                                                   *
+# *                                                                         *
+# ***************************************************************************
+
+
+# Compare the classification of the crossings by the solid classifier (crosspart.is_inside) with
+# the former boolean common with a small sphere (crosspart.is_inside_boolean) on the crosspiece
+# test documents : durations of make_cross_parts and number of different cutters. The crossings
+# are analyzed in this process, the replaced classifier would not reach the worker processes.
+#   FreeCADCmd benchmarks/cross_classification.py
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks import common
+import FreeCAD
+from lasercut import crosspart, preferences
+
+CLASSIFICATIONS = [("boolean", crosspart.is_inside_boolean), ("classifier", crosspart.is_inside)]
+
+
+def run(file_name, repeat=5):
+    document = common.open_document(file_name)
+    objects = common.get_solid_objects(document)
+    parts = common.make_parts_properties(objects)
+    report = {'file': file_name, 'parts': len(parts)}
+    results = {}
+    default_is_inside = crosspart.is_inside
+    parallel_cross_parts = preferences.parallel_cross_parts()
+    preferences.get_parameters().SetBool("ParallelCrossParts", False)
+    try:
+        for name, function in CLASSIFICATIONS:
+            crosspart.is_inside = function
+            durations, results[name] = common.measure(lambda: crosspart.make_cross_parts(parts), repeat)
+            report[name] = common.summary(durations)
+    finally:
+        crosspart.is_inside = default_is_inside
+        preferences.get_parameters().SetBool("ParallelCrossParts", parallel_cross_parts)
+    differences = 0
+    for boolean_part, classifier_part in zip(results["boolean"], results["classifier"]):
+        if len(boolean_part.toRemove) != len(classifier_part.toRemove):
+            differences += 1
+            continue
+        for boolean_cutter, classifier_cutter in zip(boolean_part.toRemove, classifier_part.toRemove):
+            if (boolean_cutter.BoundBox.Center - classifier_cutter.BoundBox.Center).Length > 10e-6 \
+                    or abs(boolean_cutter.Volume - classifier_cutter.Volume) > 10e-6:
+                differences += 1
+    report['different_cutters'] = differences
+    report['speedup'] = report["boolean"]['median'] / report["classifier"]['median']
+    FreeCAD.closeDocument(document.Name)
+    return report
+
+
+if __name__ == "__main__":
+    common.print_report([run("crosspiece.fcstd"), run("crosspiece2.fcstd")])
@@ -0,0 +1,81 @@
+#!/usr/bin/env python
+
+# ***************************************************************************
+# *                                                                         *
+# *   Copyright (c) 2016 execuc                                             *
+# *                                                                         *
+# *   This file is part of LCInterlocking module.                           *
+# *   LCInterlocking module is free software; you can redistribute it and/or*
+# *   modify it under the terms of the GNU Lesser General Public            *
+# *   License as published by the Free Software Foundation; either          *
+# *   version 2.1 of the License, or (at your option) any later version.    *
+# *                                                                         *
+# *   This module is distributed in the hope that it will be useful,       *
+# *   but WITHOUT ANY WARRANTY; without even the implied warranty of        *
+# *   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU     *
+# *   Lesser General Public License for more details.                       *
+# *                                                                         *
+# *   You should have received a copy of the GNU Lesser General Public      *
+# *   License along with this library; if not, write to the Free Software   *
+# *   Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston,            *
+# *   MA  02110-1301  USA                                                   *
+# *                                                                         *
+# ***************************************************************************
+
+
+# Compare the final assembly of MaterialElement.get_shape (one multi-argument fuse and one cut)
+# with the former sequential assembly (one boolean per tab, hole and dog bone) on test/simple_box.FCStd.
+#   FreeCADCmd benchmarks/get_shape.py
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks import common
+import FreeCAD
+from lasercut import helper
+from lasercut.join import make_tabs_joins
+from lasercut.tabproperties import TabProperties
+
+
+def sequential_get_shape(part):
+    new_shape = part.properties.freecad_object.Shape
+    to_add = helper.assemble_list_element(part.toAdd)
+    if to_add is not None:
+        new_shape = new_shape.fuse(to_add)
+    to_remove = helper.assemble_list_element(part.toRemove)
+    if to_remove is not None:
+        new_shape = new_shape.cut(to_remove)
+    return new_shape
+
+
+def run(file_name="simple_box.FCStd", tabs_number=3, repeat=5):
+    document = common.open_document(file_name)
+    objects = common.get_solid_objects(document)
+    parts = common.make_parts_properties(objects)
+    tabs = common.make_auto_tabs(objects, TabProperties.TYPE_TAB, tabs_number)
+    computed_parts = make_tabs_joins(parts, tabs)
+
+    sequential_durations, sequential_shapes = common.measure(
+        lambda: [sequential_get_shape(part) for part in computed_parts], repeat)
+    multi_durations, multi_shapes = common.measure(
+        lambda: [part.get_shape() for part in computed_parts], repeat)
+
+    max_volume_diff = 0.
+    for sequential_shape, multi_shape in zip(sequential_shapes, multi_shapes):
+        max_volume_diff = max(max_volume_diff, abs(sequential_shape.Volume - multi_shape.Volume))
+
+    sequential = common.summary(sequential_durations)
+    multi = common.summary(multi_durations)
+    report = {'file': file_name, 'parts': len(computed_parts), 'tabs': len(tabs),
+              'boolean_tools': sum([len(p.toAdd) + len(p.toRemove) for p in computed_parts]),
+              'sequential': sequential, 'multi_argument': multi,
+              'speedup': sequential['median'] / multi['median'],
+              'max_volume_difference': max_volume_diff}
+    FreeCAD.closeDocument(document.Name)
+    return report
+
+
+if __name__ == "__main__":
+    common.print_report(run())
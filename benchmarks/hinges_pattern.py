@@ -0,0 +1,106 @@
+#!/usr/bin/env python
+
+# ***************************************************************************
+# *                                                                         *
+# *   Copyright (c) 2016 execuc                                             *
+# *                                                                         *
+# *   This file is part of LCInterlocking module.                           *
+# *   LCInterlocking module is free software; you can redistribute it and/or*
+# *   modify it under the terms of the GNU Lesser General Public            *
+# *   License as published by the Free Software Foundation; either          *
+# *   version 2.1 of the License, or (at your option) any later version.    *
+# *                                                                         *
+# *   This module is distributed in the hope that it will be useful,       *
+# *   but WITHOUT ANY WARRANTY; without even the implied warranty of        *
+# *   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU     *
+# *   Lesser General Public License for more details.                       *
+# *                                                                         *
+# *   You should have received a copy of the GNU Lesser General Public      *
+# *   License along with this library; if not, write to the Free Software   *
+# *   Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston,            *
+# *   MA  02110-1301  USA                                                   *
+# *                                                                         *
+# ***************************************************************************
+
+
+
+# Check the 2D pattern of the living hinges against the flat part on test/simple_hinges.fcstd : the
+# faces of the pattern must cover the section of the flat part in the plane of the pattern, and
+# nothing more. Reports the areas of the pattern outside the part and of the part missing from the
+# pattern, and the durations of create_linked_part with and without pattern.
+#   FreeCADCmd benchmarks/hinges_pattern.py
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks import common
+import FreeCAD
+import Part
+from lasercut import helper
+from lasercut.hingesproperties import HingesProperties, GlobalLivingMaterialProperties
+from lasercut.makehinges import create_linked_part, clear_hinges_cache
+
+# Parts of the document in the order of the hinges
+CHAIN_NAMES = ["Part__Mirroring", "Box001", "Box002", "Box003", "Box"]
+MAX_DIFFERENCE_AREA = 0.01
+
+
+# Hinge between the closest faces of two parts, the sheet faces left out
+def make_hinge(first_obj, second_obj):
+    candidates = []
+    for first_index, first_face in enumerate(first_obj.Shape.Faces):
+        for second_index, second_face in enumerate(second_obj.Shape.Faces):
+            distance = first_face.CenterOfMass.distanceToPoint(second_face.CenterOfMass)
+            candidates.append((distance, first_index, second_index))
+    first_sheet_faces = helper.biggest_area_faces(first_obj.Shape)[2]
+    second_sheet_faces = helper.biggest_area_faces(second_obj.Shape)[2]
+    candidates = [candidate for candidate in candidates
+                  if not any(first_obj.Shape.Faces[candidate[1]].isSame(face) for face in first_sheet_faces)
+                  and not any(second_obj.Shape.Faces[candidate[2]].isSame(face) for face in second_sheet_faces)]
+    distance, first_index, second_index = min(candidates)
+    first_face = first_obj.Shape.Faces[first_index]
+    second_face = second_obj.Shape.Faces[second_index]
+    hinge = HingesProperties(freecad_face_1=first_face, freecad_face_1_name="Face%d" % (first_index + 1),
+                             freecad_object_1=first_obj,
+                             freecad_face_2=second_face, freecad_face_2_name="Face%d" % (second_index + 1),
+                             freecad_object_2=second_obj)
+    hinge.recomputeInit(first_obj, first_face, second_obj, second_face)
+    return hinge
+
+
+def run(file_name="simple_hinges.fcstd", repeat=3):
+    document = common.open_document(file_name)
+    objects = [document.getObject(name) for name in CHAIN_NAMES]
+    hinges = [make_hinge(first_obj, second_obj) for first_obj, second_obj in zip(objects[:-1], objects[1:])]
+    material_properties = GlobalLivingMaterialProperties(freecad_object=objects[0], thickness=3.,
+                                                         generate_pattern=True)
+    material_properties.generate_solid = False
+
+    report = {'file': file_name, 'hinges': len(hinges)}
+    for generate_pattern in [False, True]:
+        material_properties.generate_pattern = generate_pattern
+
+        def linked_part():
+            clear_hinges_cache()
+            return create_linked_part(hinges, material_properties)
+        durations, (flat_part, solid, pattern) = common.measure(linked_part, repeat)
+        report["pattern" if generate_pattern else "no_pattern"] = common.summary(durations)
+
+    normal = FreeCAD.Vector(helper.biggest_area_faces(flat_part)[0]).normalize()
+    position = pattern.Vertexes[0].Point.dot(normal)
+    section = Part.makeFace(flat_part.slice(normal, position), "Part::FaceMakerBullseye")
+    pattern_face = Part.makeFace(pattern.Wires, "Part::FaceMakerBullseye")
+    report['outside_area'] = pattern_face.cut(section).Area
+    report['missing_area'] = section.cut(pattern_face).Area
+    report['inside'] = report['outside_area'] < MAX_DIFFERENCE_AREA and report['missing_area'] < MAX_DIFFERENCE_AREA
+    FreeCAD.closeDocument(document.Name)
+    return report
+
+
+if __name__ == "__main__":
+    pattern_report = run()
+    common.print_report(pattern_report)
+    if not pattern_report['inside']:
+        sys.exit("The hinges pattern does not match the flat part")
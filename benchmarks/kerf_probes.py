@@ -0,0 +1,92 @@
+#!/usr/bin/env python
+
+# ***************************************************************************
+# *                                                                         *
+# *   Copyright (c) 2016 execuc                                             *
+# *                                                                         *
+# *   This file is part of LCInterlocking module.                           *
+# *   LCInterlocking module is free software; you can redistribute it and/or*
+# *   modify it under the terms of the GNU Lesser General Public            *
+# *   License as published by the Free Software Foundation; either          *
+# *   version 2.1 of the License, or (at your option) any later version.    *
+# *                                                                         *
+# *   This module is distributed in the hope that it will be useful,       *
+# *   but WITHOUT ANY WARRANTY; without even the implied warranty of        *
+# *   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU     *
+# *   Lesser General Public License for more details.                       *
+# *                                                                         *
+# *   You should have received a copy of the GNU Lesser General Public      *
+# *   License along with this library; if not, write to the Free Software   *
+# *   Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston,            *
+# *   MA  02110-1301  USA                                                   *
+# *                                                                         *
+# ***************************************************************************
+
+
+
+# Compare the classification of the kerf limit probes by points (helper.check_box_intersect) with
+# the former boolean common on test/simple_box.FCStd for the tab types : durations of
+# make_tabs_joins, probes classified differently and volume difference of the assembled parts.
+#   FreeCADCmd benchmarks/kerf_probes.py
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks import common
+import FreeCAD
+from lasercut import helper
+from lasercut.join import make_tabs_joins
+from lasercut.tabproperties import TabProperties
+
+TAB_TYPES = [TabProperties.TYPE_TAB, TabProperties.TYPE_T_SLOT, TabProperties.TYPE_CONTINUOUS]
+
+
+def check_box_intersect_boolean(length, width, height, position, face, part_interactor_properties):
+    box = helper.make_cached_box(length, width, height, position)
+    return helper.check_intersect(box, face, part_interactor_properties)[0]
+
+
+def run(file_name="simple_box.FCStd", repeat=5):
+    document = common.open_document(file_name)
+    objects = common.get_solid_objects(document)
+    parts = common.make_parts_properties(objects)
+    report = {'file': file_name, 'parts': len(parts)}
+    points_check_box_intersect = helper.check_box_intersect
+    differences = []
+
+    def compared_check_box_intersect(*args):
+        result = points_check_box_intersect(*args)
+        if result != check_box_intersect_boolean(*args):
+            differences.append(args[:4])
+        return result
+
+    try:
+        for tab_type in TAB_TYPES:
+            tabs = common.make_auto_tabs(objects, tab_type, 3)
+            entry = {}
+            shapes = {}
+            for name, function in [("boolean", check_box_intersect_boolean),
+                                   ("points", points_check_box_intersect)]:
+                helper.check_box_intersect = function
+                durations, computed_parts = common.measure(lambda: make_tabs_joins(parts, tabs), repeat)
+                entry[name] = common.summary(durations)
+                shapes[name] = [part.get_shape() for part in computed_parts]
+            del differences[:]
+            helper.check_box_intersect = compared_check_box_intersect
+            make_tabs_joins(parts, tabs)
+            entry['different_probes'] = len(differences)
+            entry['max_volume_difference'] = max([abs(boolean_shape.Volume - points_shape.Volume)
+                                                  for boolean_shape, points_shape
+                                                  in zip(shapes["boolean"], shapes["points"])] + [0.])
+            entry['speedup'] = entry["boolean"]['median'] / entry["points"]['median']
+            report[tab_type] = entry
+    finally:
+        helper.check_box_intersect = points_check_box_intersect
+    FreeCAD.closeDocument(document.Name)
+    return report
+
+
+if __name__ == "__main__":
+    common.print_report(run())
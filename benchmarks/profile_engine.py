@@ -0,0 +1,77 @@
+#!/usr/bin/env python
+
+# ***************************************************************************
+# *                                                                         *
+# *   Copyright (c) 2016 execuc                                             *
+# *                                                                         *
+# *   This file is part of LCInterlocking module.                           *
+# *   LCInterlocking module is free software; you can redistribute it and/or*
+# *   modify it under the terms of the GNU Lesser General Public            *
+# *   License as published by the Free Software Foundation; either          *
+# *   version 2.1 of the License, or (at your option) any later version.    *
+# *                                                                         *
+# *   This module is distributed in the hope that it will be useful,       *
+# *   but WITHOUT ANY WARRANTY; without even the implied warranty of        *
+# *   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU     *
+# *   Lesser General Public License for more details.                       *
+# *                                                                         *
+# *   You should have received a copy of the GNU Lesser General Public      *
+# *   License along with this library; if not, write to the Free Software   *
+# *   Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston,            *
+# *   MA  02110-1301  USA                                                   *
+# *                                                                         *
+# ***************************************************************************
+
+
+# Compare the profile engine (2D booleans on the sheet sections, one extrusion) with the solid
+# engine (3D booleans) on test/simple_box.FCStd : durations of the parts assembly and volume of the
+# symmetric difference between the parts of both engines. The engines are equivalent when this
+# volume stays below MAX_DIFFERENCE_VOLUME for every tab type, else the script exits with an error.
+#   FreeCADCmd benchmarks/profile_engine.py
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks import common
+import FreeCAD
+from lasercut import preferences
+from lasercut.join import make_tabs_joins
+from lasercut.tabproperties import TabProperties
+
+TAB_TYPES = [TabProperties.TYPE_TAB, TabProperties.TYPE_T_SLOT, TabProperties.TYPE_CONTINUOUS]
+MAX_DIFFERENCE_VOLUME = 0.01
+
+
+def run(file_name="simple_box.FCStd", repeat=5):
+    document = common.open_document(file_name)
+    objects = common.get_solid_objects(document)
+    parts = common.make_parts_properties(objects)
+    report = {'file': file_name, 'parts': len(parts)}
+    shapes = {}
+    for tab_type in TAB_TYPES:
+        tabs = common.make_auto_tabs(objects, tab_type, 3)
+        for engine in [preferences.JOIN_ENGINE_SOLID, preferences.JOIN_ENGINE_PROFILE]:
+            computed_parts = make_tabs_joins(parts, tabs, engine)
+            durations, shapes[engine] = common.measure(
+                lambda: [part.get_shape() for part in computed_parts], repeat)
+            report["%s_%s" % (tab_type, engine)] = common.summary(durations)
+        difference = 0.
+        for solid_shape, profile_shape in zip(shapes[preferences.JOIN_ENGINE_SOLID],
+                                              shapes[preferences.JOIN_ENGINE_PROFILE]):
+            difference = max(difference, solid_shape.cut(profile_shape).Volume
+                             + profile_shape.cut(solid_shape).Volume)
+        report["%s_max_difference_volume" % tab_type] = difference
+        report["%s_equivalent" % tab_type] = difference < MAX_DIFFERENCE_VOLUME
+        report["%s_speedup" % tab_type] = report["%s_%s" % (tab_type, preferences.JOIN_ENGINE_SOLID)]['median'] \
+            / report["%s_%s" % (tab_type, preferences.JOIN_ENGINE_PROFILE)]['median']
+    FreeCAD.closeDocument(document.Name)
+    return report
+
+
+if __name__ == "__main__":
+    engine_report = run()
+    common.print_report(engine_report)
+    if not all(engine_report["%s_equivalent" % tab_type] for tab_type in TAB_TYPES):
+        sys.exit("Profile and solid engines are not equivalent")
@@ -0,0 +1,186 @@
+#!/usr/bin/env python
+
+# ***************************************************************************
+# *                                                                         *
+# *   Copyright (c) 2016 execuc                                             *
+# *                                                                         *
+# *   This file is part of LCInterlocking module.                           *
+# *   LCInterlocking module is free software; you can redistribute it and/or*
+# *   modify it under the terms of the GNU Lesser General Public            *
+# *   License as published by the Free Software Foundation; either          *
+# *   version 2.1 of the License, or (at your option) any later version.    *
+# *                                                                         *
+# *   This module is distributed in the hope that it will be useful,       *
+# *   but WITHOUT ANY WARRANTY; without even the implied warranty of        *
+# *   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU     *
+# *   Lesser General Public License for more details.                       *
+# *                                                                         *
+# *   You should have received a copy of the GNU Lesser General Public      *
+# *   License along with this library; if not, write to the Free Software   *
+# *   Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston,            *
+# *   MA  02110-1301  USA                                                   *
+# *                                                                         *
+# ***************************************************************************
+
+
+# Benchmarks of the joins, crosspiece and living hinges on synthetic assemblies of increasing
+# size, made with the box and rounded box generators. Runs without GUI :
+#   FreeCADCmd benchmarks/suite.py
+# Environment variables (FreeCADCmd opens its arguments as files) :
+#   LCINTERLOCKING_BENCH_SIZES   sizes of the assemblies, default "1,2,3"
+#   LCINTERLOCKING_BENCH_REPEAT  runs of each measure, default 3
+#   LCINTERLOCKING_BENCH_OUTPUT  JSON report file, default printed on the standard output
+# Each benchmark runs in its own FreeCADCmd process so that its peak memory is its own.
+# A size n means n x n boxes for the joins and the crosspiece, and 4 * n sides for the rounded box.
+
+import os
+import sys
+import json
+import platform
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks import common
+import FreeCAD
+from lasercut import makebox, makeroundedbox
+from lasercut.boxproperties import BoxProperties, TopBottomProperties
+from lasercut.roundedboxproperties import RoundedBoxProperties, TopBottomRoundedProperties
+from lasercut.hingesproperties import HingesProperties, GlobalLivingMaterialProperties
+from lasercut.join import make_tabs_joins
+from lasercut.crosspart import make_cross_parts
+from lasercut.makehinges import create_linked_part
+from lasercut.tabproperties import TabProperties
+
+BOX_SPACING = 20.
+CROSS_PANELS = ["face_panel", "behind_panel", "left_panel", "right_panel"]
+
+
+def get_options():
+    sizes = [int(size) for size in os.environ.get("LCINTERLOCKING_BENCH_SIZES", "1,2,3").split(",")]
+    repeat = int(os.environ.get("LCINTERLOCKING_BENCH_REPEAT", "3"))
+    output = os.environ.get("LCINTERLOCKING_BENCH_OUTPUT", "")
+    return sizes, repeat, output
+
+
+# Grid of size x size boxes, only the panels in panel_names are kept when it is given
+def make_boxes_grid(document, size, box_properties, panel_names=None):
+    objects = []
+    part_list = makebox.make_box(box_properties, TopBottomProperties(), TopBottomProperties())
+    if panel_names is not None:
+        part_list = [part for part in part_list if part['name'] in panel_names]
+    for x in range(size):
+        for y in range(size):
+            offset = FreeCAD.Vector(x * (box_properties.length + BOX_SPACING),
+                                    y * (box_properties.width + BOX_SPACING), 0)
+            objects.extend(common.add_shapes(document, part_list, "box_%d_%d_" % (x, y), offset))
+    return objects
+
+
+def assemble(computed_parts):
+    return [part.get_shape() for part in computed_parts]
+
+
+def bench_joins(size, repeat):
+    document = FreeCAD.newDocument("bench_joins_%d" % size)
+    objects = make_boxes_grid(document, size, BoxProperties())
+    parts = common.make_parts_properties(objects)
+    tabs = common.make_auto_tabs(objects, TabProperties.TYPE_TAB, 2)
+    joins_durations, computed_parts = common.measure(lambda: make_tabs_joins(parts, tabs), repeat)
+    assembly_durations, shapes = common.measure(lambda: assemble(computed_parts), repeat)
+    report = {'name': "make_tabs_joins", 'size': size, 'parts': len(parts), 'tabs': len(tabs),
+              'joins': common.summary(joins_durations), 'assembly': common.summary(assembly_durations),
+              'volume': sum([shape.Volume for shape in shapes]), 'peak_memory_kb': common.peak_memory()}
+    FreeCAD.closeDocument(document.Name)
+    return report
+
+
+def bench_cross_parts(size, repeat):
+    document = FreeCAD.newDocument("bench_cross_%d" % size)
+    box_properties = BoxProperties(length_width_priority=BoxProperties.CROSS_PRIORTY,
+                                   length_outside=10., width_outside=10.)
+    objects = make_boxes_grid(document, size, box_properties, CROSS_PANELS)
+    parts = common.make_parts_properties(objects)
+    cross_durations, computed_parts = common.measure(lambda: make_cross_parts(parts), repeat)
+    assembly_durations, shapes = common.measure(lambda: assemble(computed_parts), repeat)
+    report = {'name': "make_cross_parts", 'size': size, 'parts': len(parts),
+              'cross_parts': common.summary(cross_durations), 'assembly': common.summary(assembly_durations),
+              'volume': sum([shape.Volume for shape in shapes]), 'peak_memory_kb': common.peak_memory()}
+    FreeCAD.closeDocument(document.Name)
+    return report
+
+
+# Faces at the ends of a rounded box side : vertical faces other than the two biggest ones
+def get_side_end_faces(obj):
+    faces = []
+    for index, face in enumerate(obj.Shape.Faces):
+        if abs(face.normalAt(0, 0).z) < 10e-6:
+            faces.append((face.Area, index, face))
+    faces.sort(key=lambda item: item[0])
+    return [(index, face) for area, index, face in faces[:-2]]
+
+
+# Hinge between the closest end faces of two consecutive sides
+def make_side_hinge(first_obj, second_obj):
+    candidates = []
+    for first_index, first_face in get_side_end_faces(first_obj):
+        for second_index, second_face in get_side_end_faces(second_obj):
+            distance = first_face.CenterOfMass.distanceToPoint(second_face.CenterOfMass)
+            candidates.append((distance, first_index, second_index))
+    distance, first_index, second_index = min(candidates)
+    first_face = first_obj.Shape.Faces[first_index]
+    second_face = second_obj.Shape.Faces[second_index]
+    return HingesProperties(freecad_face_1=first_face, freecad_face_1_name="Face%d" % (first_index + 1),
+                            freecad_object_1=first_obj,
+                            freecad_face_2=second_face, freecad_face_2_name="Face%d" % (second_index + 1),
+                            freecad_object_2=second_obj)
+
+
+# hinges_faces items are (hinge, first object, first face, second object, second face)
+def complete_hinges(hinges_faces):
+    for hinge, first_obj, first_face, second_obj, second_face in hinges_faces:
+        hinge.recomputeInit(first_obj, first_face, second_obj, second_face)
+
+
+def bench_living_hinges(size, repeat):
+    document = FreeCAD.newDocument("bench_hinges_%d" % size)
+    box_properties = RoundedBoxProperties(nb_face=4 * size)
+    part_list = makeroundedbox.make_rounded_box(box_properties, TopBottomRoundedProperties(),
+                                                TopBottomRoundedProperties())
+    sides = [part for part in part_list if part['name'].startswith("side_face_")]
+    objects = common.add_shapes(document, sides)
+    hinges = []
+    hinges_faces = []
+    for first_obj, second_obj in zip(objects[:-1], objects[1:]):
+        hinge = make_side_hinge(first_obj, second_obj)
+        hinges.append(hinge)
+        hinges_faces.append((hinge, first_obj, first_obj.Shape.getElement(hinge.freecad_face_1_name),
+                             second_obj, second_obj.Shape.getElement(hinge.freecad_face_2_name)))
+    material_properties = GlobalLivingMaterialProperties(freecad_object=objects[0],
+                                                         thickness=box_properties.thickness)
+    complete_durations, result = common.measure(lambda: complete_hinges(hinges_faces), repeat)
+    linked_durations, shapes = common.measure(lambda: create_linked_part(hinges, material_properties), repeat)
+    report = {'name': "create_linked_part", 'size': size, 'parts': len(objects), 'hinges': len(hinges),
+              'complete_hinges': common.summary(complete_durations),
+              'linked_part': common.summary(linked_durations),
+              'volume': shapes[0].Volume, 'peak_memory_kb': common.peak_memory()}
+    FreeCAD.closeDocument(document.Name)
+    return report
+
+
+def run(sizes=(1, 2, 3), repeat=3):
+    benchmarks = []
+    for bench in [bench_joins, bench_cross_parts, bench_living_hinges]:
+        for size in sizes:
+            benchmarks.append(common.run_isolated("benchmarks.suite." + bench.__name__, size=size, repeat=repeat))
+    return {'freecad_version': ".".join(FreeCAD.Version()[:3]), 'python': platform.python_version(),
+            'repeat': repeat, 'benchmarks': benchmarks}
+
+
+if __name__ == "__main__":
+    bench_sizes, bench_repeat, output_path = get_options()
+    suite_report = run(bench_sizes, bench_repeat)
+    if output_path:
+        with open(output_path, "w") as output_file:
+            json.dump(suite_report, output_file, indent=2, sort_keys=True)
+    else:
+        common.print_report(suite_report)
@@ -0,0 +1,244 @@
+#!/usr/bin/env python
+
+# ***************************************************************************
+# *                                                                         *
+# *   Copyright (c) 2016 execuc                                             *
+# *                                                                         *
+# *   This file is part of LCInterlocking module.                           *
+# *   LCInterlocking module is free software; you can redistribute it and/or*
+# *   modify it under the terms of the GNU Lesser General Public            *
+# *   License as published by the Free Software Foundation; either          *
+# *   version 2.1 of the License, or (at your option) any later version.    *
+# *                                                                         *
+# *   This module is distributed in the hope that it will be useful,       *
+# *   but WITHOUT ANY WARRANTY; without even the implied warranty of        *
+# *   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU     *
+# *   Lesser General Public License for more details.                       *
+# *                                                                         *
+# *   You should have received a copy of the GNU Lesser General Public      *
+# *   License along with this library; if not, write to the Free Software   *
+# *   Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston,            *
+# *   MA  02110-1301  USA                                                   *
+# *                                                                         *
+# ***************************************************************************
+
+
+
+# Headless generation of boxes from a table of parameters, one box by row. Runs without GUI :
+#   FreeCADCmd lasercut/batchbox.py
+# Environment variables (FreeCADCmd opens its arguments as files) :
+#   LCINTERLOCKING_BATCH_TABLE    CSV or JSON table of parameters
+#   LCINTERLOCKING_BATCH_OUTPUT   output directory, default "boxes" next to the table
+#   LCINTERLOCKING_BATCH_FORMAT   "brep" (one directory of BREP files by box) or "fcstd", default "brep"
+#   LCINTERLOCKING_BATCH_WORKERS  number of FreeCADCmd processes, default "ParallelWorkers", 1 to
+#                                 generate the boxes in this process
+# Columns are the BoxProperties parameters, TopBottomProperties parameters are prefixed with "top_"
+# or "bottom_" and the optional "name" column names the files of the row, it is suffixed with the
+# row number when it is duplicated. A JSON table is a list of objects with the same keys. Missing
+# parameters keep their default value. A failed row is reported and does not stop the batch, the
+# report is written in report.json in the output directory.
+
+import os
+import sys
+import csv
+import json
+import time
+import re
+import traceback
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import FreeCAD
+from lasercut import makebox, workerpool
+from lasercut.boxproperties import BoxProperties, TopBottomProperties
+
+FORMAT_BREP = "brep"
+FORMAT_FCSTD = "fcstd"
+TOP_PREFIX = "top_"
+BOTTOM_PREFIX = "bottom_"
+NAME_COLUMN = "name"
+REPORT_FILE = "report.json"
+TRUE_VALUES = ("1", "true", "yes", "on")
+FALSE_VALUES = ("0", "false", "no", "off")
+
+
+def read_table(table_path):
+    with open(table_path) as table_file:
+        if table_path.lower().endswith(".json"):
+            rows = json.load(table_file)
+        else:
+            rows = [row for row in csv.DictReader(table_file)]
+    if not isinstance(rows, list):
+        raise ValueError("Table %s must be a list of rows" % table_path)
+    return rows
+
+
+def get_row_name(row, index):
+    name = str(row.get(NAME_COLUMN) or "").strip()
+    if not name:
+        name = "box_%03d" % (index + 1)
+    return re.sub(r"[^\w\-]", "_", name)
+
+
+# Rows sharing a name, compared without case for case insensitive file systems, are suffixed with
+# their row number so that they do not overwrite the files of each other.
+def get_row_names(rows):
+    names = [get_row_name(row, index) for index, row in enumerate(rows)]
+    counts = {}
+    for name in names:
+        counts[name.lower()] = counts.get(name.lower(), 0) + 1
+    used = set(name.lower() for name in names if counts[name.lower()] == 1)
+    unique_names = []
+    for index, name in enumerate(names):
+        if counts[name.lower()] > 1:
+            suffix = index + 1
+            while ("%s_%03d" % (name, suffix)).lower() in used:
+                suffix += len(rows)
+            name = "%s_%03d" % (name, suffix)
+            FreeCAD.Console.PrintWarning("Row %d : duplicated name, renamed to %s\n" % (index + 1, name))
+        used.add(name.lower())
+        unique_names.append(name)
+    return unique_names
+
+
+# Converts a value of the table, strings from CSV files, to the type of the default value
+def convert_value(value, default):
+    if isinstance(default, bool):
+        if isinstance(value, bool):
+            return value
+        text = str(value).strip().lower()
+        if text in TRUE_VALUES:
+            return True
+        if text in FALSE_VALUES:
+            return False
+        raise ValueError("Invalid boolean value %s" % value)
+    if isinstance(default, float):
+        return float(value)
+    return str(value)
+
+
+# Parameters are set with setattr and not by the constructor so that they are checked against
+# the default values.
+def set_parameters(properties, parameters):
+    for key, value in parameters.items():
+        if key == 'obj_class' or not hasattr(properties, key):
+            raise ValueError("Unknown parameter %s for %s" % (key, properties.obj_class))
+        setattr(properties, key, convert_value(value, getattr(properties, key)))
+    return properties
+
+
+def make_properties(row):
+    parameters = {'box': {}, 'top': {}, 'bottom': {}}
+    for key, value in row.items():
+        if key is None or key == NAME_COLUMN or value is None or str(value).strip() == "":
+            continue
+        if key.startswith(TOP_PREFIX):
+            parameters['top'][key[len(TOP_PREFIX):]] = value
+        elif key.startswith(BOTTOM_PREFIX):
+            parameters['bottom'][key[len(BOTTOM_PREFIX):]] = value
+        else:
+            parameters['box'][key] = value
+    box_properties = set_parameters(BoxProperties(), parameters['box'])
+    top_properties = set_parameters(TopBottomProperties(), parameters['top'])
+    bottom_properties = set_parameters(TopBottomProperties(), parameters['bottom'])
+    return box_properties, top_properties, bottom_properties
+
+
+def write_brep_bundle(parts, output_path):
+    if not os.path.isdir(output_path):
+        os.makedirs(output_path)
+    for part in parts:
+        part['shape'].exportBrep(os.path.join(output_path, part['name'] + ".brep"))
+    return output_path
+
+
+def write_fcstd_bundle(parts, name, output_path):
+    document = FreeCAD.newDocument(name)
+    try:
+        for part in parts:
+            document.addObject("Part::Feature", part['name']).Shape = part['shape']
+        document.recompute()
+        document.saveAs(output_path)
+    finally:
+        FreeCAD.closeDocument(document.Name)
+    return output_path
+
+
+# Job of a row, run by a worker or in this process. The result is serializable in JSON.
+def make_box_bundle(row, name, output_dir, output_format):
+    start = time.perf_counter()
+    box_properties, top_properties, bottom_properties = make_properties(row)
+    parts = makebox.make_box(box_properties, top_properties, bottom_properties)
+    if output_format == FORMAT_FCSTD:
+        output_path = write_fcstd_bundle(parts, name, os.path.join(output_dir, name + ".FCStd"))
+    else:
+        output_path = write_brep_bundle(parts, os.path.join(output_dir, name))
+    return {'file': output_path, 'parts': len(parts), 'duration': time.perf_counter() - start}
+
+
+def run_rows_sequential(jobs):
+    results = []
+    for function_name, arguments in jobs:
+        try:
+            results.append(make_box_bundle(**arguments))
+        except Exception:
+            results.append({'error': traceback.format_exc()})
+    return results
+
+
+# Returns the report of the batch, one entry by row with its duration or its error
+def run_batch(table_path, output_dir, output_format=FORMAT_BREP, nb_workers=None):
+    if output_format not in (FORMAT_BREP, FORMAT_FCSTD):
+        raise ValueError("Unknown output format %s" % output_format)
+    if not os.path.isdir(output_dir):
+        os.makedirs(output_dir)
+    rows = read_table(table_path)
+    names = get_row_names(rows)
+    jobs = [("lasercut.batchbox.make_box_bundle",
+             {'row': row, 'name': name, 'output_dir': os.path.abspath(output_dir), 'output_format': output_format})
+            for row, name in zip(rows, names)]
+
+    start = time.perf_counter()
+    if len(jobs) > 1 and nb_workers != 1 and workerpool.is_available():
+        results = workerpool.run_jobs(jobs, nb_workers)
+    else:
+        results = run_rows_sequential(jobs)
+    duration = time.perf_counter() - start
+
+    report_rows = []
+    for index, (name, result) in enumerate(zip(names, results)):
+        report_row = {'row': index + 1, 'name': name}
+        report_row.update(result)
+        report_rows.append(report_row)
+    failures = len([row for row in report_rows if 'error' in row])
+    report = {'table': os.path.abspath(table_path), 'format': output_format, 'duration': duration,
+              'rows': len(rows), 'failures': failures, 'results': report_rows}
+    with open(os.path.join(output_dir, REPORT_FILE), "w") as report_file:
+        json.dump(report, report_file, indent=2, sort_keys=True)
+    return report
+
+
+def print_report(report):
+    for row in report['results']:
+        if 'error' in row:
+            print("%4d %-30s FAILED\n%s" % (row['row'], row['name'], row['error']))
+        else:
+            print("%4d %-30s %8.3f s %3d parts  %s" % (row['row'], row['name'], row['duration'],
+                                                       row['parts'], row['file']))
+    print("%d rows, %d failures, %.3f s" % (report['rows'], report['failures'], report['duration']))
+
+
+def get_options():
+    table_path = os.environ.get("LCINTERLOCKING_BATCH_TABLE", "")
+    if not table_path:
+        raise ValueError("LCINTERLOCKING_BATCH_TABLE is not set")
+    default_output = os.path.join(os.path.dirname(os.path.abspath(table_path)), "boxes")
+    output_dir = os.environ.get("LCINTERLOCKING_BATCH_OUTPUT", default_output)
+    output_format = os.environ.get("LCINTERLOCKING_BATCH_FORMAT", FORMAT_BREP).lower()
+    nb_workers = os.environ.get("LCINTERLOCKING_BATCH_WORKERS", "")
+    return table_path, output_dir, output_format, int(nb_workers) if nb_workers else None
+
+
+if __name__ == "__main__":
+    batch_options = get_options()
+    print_report(run_batch(*batch_options))
@@ -24,15 +24,55 @@
 
 import Part
 import FreeCAD
-import itertools
+import functools
 import lasercut.helper as helper
+from lasercut import shapecache, instrumentation, preferences, workerpool
 from lasercut.material import MaterialProperties
 
 
-def is_inside(face, shape_to_test):
+cross_pairs_stats = {'pairs': 0, 'pruned': 0, 'parallel': 0}
+
+
+instrumentation.register_counters("cross pairs", cross_pairs_stats)
+
+
+# A point just outside the face is inside the shape if the shape is within IS_INSIDE_TOLERANCE of it.
+# The solid classifier is used, results are cached by shape and point since the same faces are
+# tested for several pairs. An entry keeps its shape, so that the hash code of the shape is not
+# given to another one while the entry exists, and it is checked to be the same shape.
+IS_INSIDE_OFFSET = 0.1
+IS_INSIDE_TOLERANCE = 0.04
+IS_INSIDE_CACHE_SIZE = 4096
+is_inside_cache = {}
+
+
+def clear_is_inside_cache():
+    is_inside_cache.clear()
+
+
+def get_is_inside_point(face):
     normal = face.normalAt(0, 0)
-    point = face.CenterOfMass + normal.normalize() * 0.1
-    sphere = Part.makeSphere(0.04, point)
+    return face.CenterOfMass + normal.normalize() * IS_INSIDE_OFFSET
+
+
+@instrumentation.timed("cross classification")
+def is_inside(face, shape_to_test):
+    point = get_is_inside_point(face)
+    key = (shape_to_test.hashCode(), round(point.x, helper.PRIMITIVE_PRECISION),
+           round(point.y, helper.PRIMITIVE_PRECISION), round(point.z, helper.PRIMITIVE_PRECISION))
+    entry = is_inside_cache.get(key)
+    if entry is not None and entry[0].isSame(shape_to_test):
+        return entry[1]
+    inside = shape_to_test.isInside(point, IS_INSIDE_TOLERANCE, True)
+    if len(is_inside_cache) >= IS_INSIDE_CACHE_SIZE:
+        is_inside_cache.clear()
+    is_inside_cache[key] = (shape_to_test, inside)
+    return inside
+
+
+# Former classification by a boolean common with a small sphere, kept for the benchmarks
+def is_inside_boolean(face, shape_to_test):
+    sphere = Part.makeSphere(IS_INSIDE_TOLERANCE, get_is_inside_point(face))
     #Part.show(sphere)
     return sphere.common(shape_to_test).Volume > 0.00001
 
@@ -266,45 +306,212 @@ def retrieve_face_axis(sorted_areas_by_normals, shape):
     return x_axis, y_axis, z_axis
 
 
-def remove_intersections(first_part, second_part, referential_faces, axis, invert_y = False):
-    height = (referential_faces[0].CenterOfMass - referential_faces[1].CenterOfMass).Length / 2.0
-    first_box_x = second_part.properties.thickness + second_part.properties.thickness_tolerance - second_part.properties.laser_beam_diameter + second_part.properties.hole_width_tolerance
-    first_box = make_cross_box(first_box_x, first_part.properties.thickness, height,
-                               first_part.properties.node_type, first_part.properties.node_thickness)
-    first_box = make_nodes_xz(first_box, first_box_x, first_part.properties.thickness, height,
-                              first_part.properties.node_type, first_part.properties.node_thickness)
-    dog_bone_radius = min(first_box_x, height) * 2. / 30.
+# In grids, crossings share the same dimensions. Cutters are built once at the origin of the
+# crossing frame for each set of rounded dimensions, then copies are placed by one transform.
+CROSS_CUTTER_CACHE_SIZE = 256
+
+
+@functools.lru_cache(maxsize=CROSS_CUTTER_CACHE_SIZE)
+def make_canonical_first_cutter(box_x, thickness, height, node_type, node_thickness, dog_bone, invert_y):
+    first_box = make_cross_box(box_x, thickness, height, node_type, node_thickness)
+    first_box = make_nodes_xz(first_box, box_x, thickness, height, node_type, node_thickness)
+    dog_bone_radius = min(box_x, height) * 2. / 30.
 
     if invert_y:
-        if first_part.properties.dog_bone:
-            first_box = make_dog_bones_xz(first_box, first_box_x, first_part.properties.thickness, height, dog_bone_radius, True)
+        if dog_bone:
+            first_box = make_dog_bones_xz(first_box, box_x, thickness, height, dog_bone_radius, True)
         first_box.translate(FreeCAD.Vector(0, 0, -height))
-    elif first_part.properties.dog_bone:
-        first_box = make_dog_bones_xz(first_box, first_box_x, first_part.properties.thickness, height, dog_bone_radius, False)
-
-    transform_matrix = get_transformation_matrix_from_vectors(axis[0], axis[1], axis[2])
-    transform(first_box, referential_faces[0], transform_matrix)
+    elif dog_bone:
+        first_box = make_dog_bones_xz(first_box, box_x, thickness, height, dog_bone_radius, False)
+    return first_box
 
-    second_box_y = first_part.properties.thickness + first_part.properties.thickness_tolerance - first_part.properties.laser_beam_diameter + first_part.properties.hole_width_tolerance
-    second_box = make_cross_box(second_part.properties.thickness, second_box_y, height,
-                                second_part.properties.node_type, second_part.properties.node_thickness)
-    second_box = make_nodes_yz(second_box, second_part.properties.thickness, second_box_y, height,
-                               second_part.properties.node_type, second_part.properties.node_thickness)
 
-    dog_bone_radius = min(second_box_y, height) * 2. / 30.
+@functools.lru_cache(maxsize=CROSS_CUTTER_CACHE_SIZE)
+def make_canonical_second_cutter(thickness, box_y, height, node_type, node_thickness, dog_bone, invert_y):
+    second_box = make_cross_box(thickness, box_y, height, node_type, node_thickness)
+    second_box = make_nodes_yz(second_box, thickness, box_y, height, node_type, node_thickness)
+    dog_bone_radius = min(box_y, height) * 2. / 30.
 
     if not invert_y:
-        if second_part.properties.dog_bone:
-            second_box = make_dog_bones_yz(second_box, second_part.properties.thickness, second_box_y,height, dog_bone_radius, True)
+        if dog_bone:
+            second_box = make_dog_bones_yz(second_box, thickness, box_y, height, dog_bone_radius, True)
         second_box.translate(FreeCAD.Vector(0, 0, -height))
-    elif second_part.properties.dog_bone:
-        second_box = make_dog_bones_yz(second_box, second_part.properties.thickness, second_box_y, height, dog_bone_radius, False)
+    elif dog_bone:
+        second_box = make_dog_bones_yz(second_box, thickness, box_y, height, dog_bone_radius, False)
+    return second_box
+
+
+def cross_cutter_cache_info():
+    info = {}
+    for name, function in [('first', make_canonical_first_cutter), ('second', make_canonical_second_cutter)]:
+        cache_info = function.cache_info()
+        info[name] = {'hits': cache_info.hits, 'misses': cache_info.misses, 'size': cache_info.currsize}
+    return info
+
+
+def clear_cross_cutter_cache():
+    make_canonical_first_cutter.cache_clear()
+    make_canonical_second_cutter.cache_clear()
+
+
+# Returns the shapes to remove from the first and the second parts
+@instrumentation.timed("cross cutters")
+def make_cross_cutters(first_properties, second_properties, referential_faces, axis, invert_y = False):
+    precision = helper.PRIMITIVE_PRECISION
+    height = round((referential_faces[0].CenterOfMass - referential_faces[1].CenterOfMass).Length / 2.0, precision)
+    first_box_x = second_properties.thickness + second_properties.thickness_tolerance - second_properties.laser_beam_diameter + second_properties.hole_width_tolerance
+    first_box = make_canonical_first_cutter(round(first_box_x, precision), round(first_properties.thickness, precision),
+                                            height, first_properties.node_type,
+                                            round(first_properties.node_thickness, precision),
+                                            bool(first_properties.dog_bone), invert_y).copy()
+
+    second_box_y = first_properties.thickness + first_properties.thickness_tolerance - first_properties.laser_beam_diameter + first_properties.hole_width_tolerance
+    second_box = make_canonical_second_cutter(round(second_properties.thickness, precision), round(second_box_y, precision),
+                                              height, second_properties.node_type,
+                                              round(second_properties.node_thickness, precision),
+                                              bool(second_properties.dog_bone), invert_y).copy()
+
+    transform_matrix = get_transformation_matrix_from_vectors(axis[0], axis[1], axis[2])
+    transform(first_box, referential_faces[0], transform_matrix)
     transform(second_box, referential_faces[0], transform_matrix)
 
     #Part.show(first_box)
     #Part.show(second_box)
-    first_part.toRemove.append(first_box)
-    second_part.toRemove.append(second_box)
+    return first_box, second_box
+
+
+CROSS_BOUND_BOX_TOLERANCE = 10e-4
+
+
+def is_bound_box_overlapping(first_box, second_box, tolerance=CROSS_BOUND_BOX_TOLERANCE):
+    return first_box.XMin <= second_box.XMax + tolerance and second_box.XMin <= first_box.XMax + tolerance \
+        and first_box.YMin <= second_box.YMax + tolerance and second_box.YMin <= first_box.YMax + tolerance \
+        and first_box.ZMin <= second_box.ZMax + tolerance and second_box.ZMin <= first_box.ZMax + tolerance
+
+
+# Broad phase : sweep and prune of the bounding boxes along X, then pairs of parts lying in parallel
+# planes are left out since they can not cross. Returns the pairs of indexes in the order of
+# itertools.combinations.
+def get_candidate_pairs(parts_element):
+    shapes = [part.properties.freecad_object.Shape for part in parts_element]
+    bound_boxes = [shape.BoundBox for shape in shapes]
+    normals = [helper.biggest_area_faces(shape)[0] for shape in shapes]
+    nb_parts = len(parts_element)
+    nb_pairs = nb_parts * (nb_parts - 1) // 2
+
+    pairs = []
+    parallel = 0
+    active = []
+    for index in sorted(range(nb_parts), key=lambda part_index: bound_boxes[part_index].XMin):
+        bound_box = bound_boxes[index]
+        active = [other for other in active if bound_boxes[other].XMax + CROSS_BOUND_BOX_TOLERANCE >= bound_box.XMin]
+        for other in active:
+            if not is_bound_box_overlapping(bound_boxes[other], bound_box):
+                continue
+            if helper.compare_freecad_vector_direction(normals[other], normals[index]):
+                parallel += 1
+                continue
+            pairs.append((min(index, other), max(index, other)))
+        active.append(index)
+
+    cross_pairs_stats['pairs'] += nb_pairs
+    cross_pairs_stats['pruned'] += nb_pairs - len(pairs) - parallel
+    cross_pairs_stats['parallel'] += parallel
+    pairs.sort()
+    return pairs
+
+
+# Values of the material properties used by the cutters, they are sent to the worker processes
+CROSS_CUTTER_PROPERTIES = ('thickness', 'thickness_tolerance', 'laser_beam_diameter', 'hole_width_tolerance',
+                           'dog_bone', 'node_type', 'node_thickness')
+
+
+def get_cutter_properties(properties):
+    return dict((key, getattr(properties, key)) for key in CROSS_CUTTER_PROPERTIES)
+
+
+# Analysis of one pair of parts, it only depends on its arguments so that pairs can be analyzed
+# by worker processes. Returns the cutters of both parts, or an empty dictionary if the parts do
+# not cross.
+def analyze_cross_pair(first_shape, second_shape, first_properties, second_properties, pair_name):
+    with instrumentation.stage("cross intersections"):
+        intersect_shape = first_shape.common(second_shape)
+    if intersect_shape.Volume <= 0.001:
+        return {}
+    #Part.show(intersect_shape)
+    sorted_areas_by_normals = helper.sort_area_shape_faces(intersect_shape)
+    if len(sorted_areas_by_normals) != 3:
+        raise ValueError(pair_name + " : intersection is not rectangular box")
+    smallest_area = helper.sort_area_shape_faces(intersect_shape)[0]
+    referential_faces = smallest_area[2]
+    first_face = referential_faces[0]
+    second_face = referential_faces[1]
+    axis = retrieve_face_axis(sorted_areas_by_normals, first_shape)
+    # Examine box border to determine shapes configuration
+    first_face_first_shape = is_inside(first_face, first_shape)
+    second_face_first_shape = is_inside(second_face, first_shape)
+    first_face_second_shape = is_inside(first_face, second_shape)
+    second_face_second_shape = is_inside(second_face, second_shape)
+    #print "first_face_first_shape: " + str(first_face_first_shape) + " second_face_first_shape:" + str(second_face_first_shape) + " first_face_second_shape: " + str(first_face_second_shape) + " second_face_second_shape:" + str(second_face_second_shape)
+    if not first_face_first_shape and not second_face_first_shape \
+            and first_face_second_shape and second_face_second_shape:
+        raise ValueError(pair_name + " : a part is included in the other.")
+    elif first_face_first_shape and second_face_first_shape \
+            and not first_face_second_shape and not second_face_second_shape:
+        raise ValueError(pair_name + " : a part is included in the other.")
+    elif not first_face_first_shape and not second_face_first_shape \
+            and not first_face_second_shape and not second_face_second_shape:
+        #print pair_name + " : same height parts"
+        invert_y = False
+    elif not first_face_first_shape and second_face_first_shape \
+            and first_face_second_shape and not second_face_second_shape:
+        #print pair_name + " : a part is above the other (1)"
+        invert_y = False
+    elif first_face_first_shape and not second_face_first_shape \
+            and not first_face_second_shape and second_face_second_shape:
+        #print pair_name + " : a part is above the other (2)"
+        invert_y = True
+    elif not first_face_first_shape and not second_face_first_shape \
+            and first_face_second_shape and not second_face_second_shape:
+        # Case where face 2 is common base and shape 2 is higher
+        invert_y = False
+    elif first_face_first_shape and not second_face_first_shape \
+            and not first_face_second_shape and not second_face_second_shape:
+        # Case where face 2 is common base and shape 1 is higher
+        invert_y = True
+    elif not first_face_first_shape and second_face_first_shape \
+            and not first_face_second_shape and not second_face_second_shape:
+        # Case where face 1 is common base and shape 1 is higher
+        invert_y = False
+    elif not first_face_first_shape and not second_face_first_shape \
+            and not first_face_second_shape and second_face_second_shape:
+        # Case where face 1 is common and shape 2 is higher
+        invert_y = True
+    else:
+        raise ValueError("Not managed")
+
+    first_cutter, second_cutter = make_cross_cutters(helper.ObjectProperties(**first_properties),
+                                                     helper.ObjectProperties(**second_properties),
+                                                     referential_faces, axis, invert_y)
+    return {'first_cutter': first_cutter, 'second_cutter': second_cutter}
+
+
+# Returns the result of analyze_cross_pair for each pair, in the order of the pairs
+def analyze_cross_pairs(parts_element, pairs):
+    jobs = []
+    for first_index, second_index in pairs:
+        first_part = parts_element[first_index]
+        second_part = parts_element[second_index]
+        jobs.append({'first_shape': first_part.properties.freecad_object.Shape,
+                     'second_shape': second_part.properties.freecad_object.Shape,
+                     'first_properties': get_cutter_properties(first_part.properties),
+                     'second_properties': get_cutter_properties(second_part.properties),
+                     'pair_name': first_part.get_name() + " -> " + second_part.get_name()})
+    if preferences.parallel_cross_parts() and len(jobs) > 1:
+        if workerpool.is_available():
+            return workerpool.run_jobs_or_raise([("lasercut.crosspart.analyze_cross_pair", job) for job in jobs])
+        FreeCAD.Console.PrintWarning("FreeCADCmd executable not found, crossings are analyzed sequentially\n")
+    return [analyze_cross_pair(**job) for job in jobs]
 
 
 #            Y
@@ -316,74 +523,35 @@ def remove_intersections(first_part, second_part, referential_faces, axis, inver
 # X is the width of part 2.
 # Y is the width of part 1.
 # Z is the height of the intersection
+@instrumentation.timed("cross parts")
 def make_cross_parts(parts):
+    for key in cross_pairs_stats:
+        cross_pairs_stats[key] = 0
+    clear_is_inside_cache()
     parts_element = []
     for part in parts:
         mat_element = helper.MaterialElement(part)
         parts_element.append(mat_element)
 
-    for subset in itertools.combinations(parts_element, 2):
-        first_part = subset[0]
-        second_part = subset[1]
-        if parts_element.index(subset[0]) > parts_element.index(subset[1]):
-            first_part = subset[1]
-            second_part = subset[0]
+    pairs = get_candidate_pairs(parts_element)
+    # Cutters are added in the order of the pairs, whatever the order the pairs were analyzed
+    for (first_index, second_index), cutters in zip(pairs, analyze_cross_pairs(parts_element, pairs)):
+        if cutters:
+            parts_element[first_index].toRemove.append(cutters['first_cutter'])
+            parts_element[second_index].toRemove.append(cutters['second_cutter'])
+
+    FreeCAD.Console.PrintLog("Cross pairs : %d, pruned by bounding box : %d, parallel : %d\n"
+                             % (cross_pairs_stats['pairs'], cross_pairs_stats['pruned'],
+                                cross_pairs_stats['parallel']))
+    FreeCAD.Console.PrintLog("Cross cutter cache : %s\n" % str(cross_cutter_cache_info()))
+    return parts_element
 
-        first_shape = first_part.properties.freecad_object.Shape
-        second_shape = second_part.properties.freecad_object.Shape
-        intersect_shape = first_shape.common(second_shape)
-        if intersect_shape.Volume > 0.001:
-            #Part.show(intersect_shape)
-            sorted_areas_by_normals = helper.sort_area_shape_faces(intersect_shape)
-            str_parts_name = first_part.get_name() + " -> " + second_part.get_name()
-            if len(sorted_areas_by_normals) != 3:
-                raise ValueError(str_parts_name + " : intersection is not rectangular box")
-            smallest_area = helper.sort_area_shape_faces(intersect_shape)[0]
-            referential_faces = smallest_area[2]
-            first_face = referential_faces[0]
-            second_face = referential_faces[1]
-            axis = retrieve_face_axis(sorted_areas_by_normals, first_shape)
-            # Examine box border to determine shapes configuration
-            first_face_first_shape = is_inside(first_face, first_shape)
-            second_face_first_shape = is_inside(second_face, first_shape)
-            first_face_second_shape = is_inside(first_face, second_shape)
-            second_face_second_shape = is_inside(second_face, second_shape)
-            #print "first_face_first_shape: " + str(first_face_first_shape) + " second_face_first_shape:" + str(second_face_first_shape) + " first_face_second_shape: " + str(first_face_second_shape) + " second_face_second_shape:" + str(second_face_second_shape)
-            if not first_face_first_shape and not second_face_first_shape \
-                    and first_face_second_shape and second_face_second_shape:
-                raise ValueError(str_parts_name + " : a part is included in the other.")
-            elif first_face_first_shape and second_face_first_shape \
-                    and not first_face_second_shape and not second_face_second_shape:
-                raise ValueError(str_parts_name + " : a part is included in the other.")
-            elif not first_face_first_shape and not second_face_first_shape \
-                    and not first_face_second_shape and not second_face_second_shape:
-                #print str_parts_name + " : same height parts"
-                remove_intersections(first_part, second_part, referential_faces, axis)
-            elif not first_face_first_shape and second_face_first_shape \
-                    and first_face_second_shape and not second_face_second_shape:
-                #print str_parts_name + " : a part is above the other (1)"
-                remove_intersections(first_part, second_part, referential_faces, axis)
-            elif first_face_first_shape and not second_face_first_shape \
-                    and not first_face_second_shape and second_face_second_shape:
-                #print str_parts_name + " : a part is above the other (2)"
-                remove_intersections(first_part, second_part, referential_faces, axis, True)
-            elif not first_face_first_shape and not second_face_first_shape \
-                    and first_face_second_shape and not second_face_second_shape:
-                # Case where face 2 is common base and shape 2 is higher
-                remove_intersections(first_part, second_part, referential_faces, axis)
-            elif first_face_first_shape and not second_face_first_shape \
-                    and not first_face_second_shape and not second_face_second_shape:
-                # Case where face 2 is common base and shape 1 is higher
-                remove_intersections(first_part, second_part, referential_faces, axis, True)
-            elif not first_face_first_shape and second_face_first_shape \
-                    and not first_face_second_shape and not second_face_second_shape:
-                # Case where face 1 is common base and shape 1 is higher
-                remove_intersections(first_part, second_part, referential_faces, axis)
-            elif not first_face_first_shape and not second_face_first_shape \
-                    and not first_face_second_shape and second_face_second_shape:
-                # Case where face 1 is common and shape 2 is higher
-                remove_intersections(first_part, second_part, referential_faces, axis, True)
-            else:
-                raise ValueError("Not managed")
 
-    return parts_element
+# Keys of the generated shapes in the shape cache, in the order of the parts. Every part may be
+# cut by all the others, so each key depends on the fingerprints of all the parts.
+def get_parts_result_keys(parts):
+    fingerprints = []
+    for part in parts:
+        fingerprints.append(helper.make_fingerprint(helper.properties_fingerprint(part),
+                                                    helper.shape_fingerprint(part.freecad_object.Shape)))
+    return [shapecache.make_key("cross", str(index), *fingerprints) for index in range(len(parts))]
@@ -25,9 +25,11 @@
 import Part
 import FreeCAD
 import lasercut.helper as helper
+from lasercut import instrumentation
 import math
 
 
+@instrumentation.timed("flexible tab construction")
 def make_flex_tab_join(tab, tab_part, other_parts):
     make_round_tab(tab, tab_part, other_parts)
     return
@@ -26,7 +26,12 @@ import Part
 import FreeCAD
 
 import math
+import itertools
+import functools
+import hashlib
+import json
 from operator import itemgetter, attrgetter
+from lasercut import preferences, workerpool, instrumentation, profile
 
 
 # http://stackoverflow.com/questions/2535917/copy-kwargs-to-self
@@ -118,6 +123,50 @@ def get_screw_nut_spec(metric_diameter, metric_length):
     raise ValueError("Unknown screw diameter")
 
 
+# Tabs, holes and dog bones of a run mostly share the same dimensions. Primitives are built once
+# at the origin for each set of rounded dimensions and copies are placed by translation.
+PRIMITIVE_CACHE_SIZE = 512
+PRIMITIVE_PRECISION = 6
+
+
+@functools.lru_cache(maxsize=PRIMITIVE_CACHE_SIZE)
+def make_canonical_box(length, width, height):
+    return Part.makeBox(length, width, height)
+
+
+@functools.lru_cache(maxsize=PRIMITIVE_CACHE_SIZE)
+def make_canonical_cylinder(radius, height, direction):
+    return Part.makeCylinder(radius, height, FreeCAD.Vector(0, 0, 0), FreeCAD.Vector(*direction))
+
+
+def make_cached_box(length, width, height, position=FreeCAD.Vector(0, 0, 0)):
+    box = make_canonical_box(round(length, PRIMITIVE_PRECISION), round(width, PRIMITIVE_PRECISION),
+                             round(height, PRIMITIVE_PRECISION)).copy()
+    box.translate(position)
+    return box
+
+
+def make_cached_cylinder(radius, height, position=FreeCAD.Vector(0, 0, 0), direction=FreeCAD.Vector(0, 0, 1)):
+    direction_key = tuple([round(value, PRIMITIVE_PRECISION) for value in (direction.x, direction.y, direction.z)])
+    cylinder = make_canonical_cylinder(round(radius, PRIMITIVE_PRECISION), round(height, PRIMITIVE_PRECISION),
+                                       direction_key).copy()
+    cylinder.translate(position)
+    return cylinder
+
+
+def primitive_cache_info():
+    info = {}
+    for name, function in [('box', make_canonical_box), ('cylinder', make_canonical_cylinder)]:
+        cache_info = function.cache_info()
+        info[name] = {'hits': cache_info.hits, 'misses': cache_info.misses, 'size': cache_info.currsize}
+    return info
+
+
+def clear_primitive_cache():
+    make_canonical_box.cache_clear()
+    make_canonical_cylinder.cache_clear()
+
+
 def transform_part(tab_to_add, face):
     y_invert = False
     if hasattr(face, 'y_invert'):
@@ -125,29 +174,170 @@ def transform_part(tab_to_add, face):
     return transform(tab_to_add, face.freecad_face, face.transform_matrix, y_invert)
 
 
+# Number of intersection probes and how many of them were rejected by the bounding box test
+# before running the boolean common()
+check_intersect_stats = {'probes': 0, 'skipped': 0, 'classified': 0, 'fallbacks': 0}
+
+
+instrumentation.register_counters("intersections", check_intersect_stats)
+
+
+def reset_check_intersect_stats():
+    for key in check_intersect_stats:
+        check_intersect_stats[key] = 0
+
+
+@instrumentation.timed("intersection probes")
 def check_intersect(tab_to_add, face, part_interactor_properties):
     tab_to_add_transformed = transform_part(tab_to_add, face)
     part_shape_transformed = part_interactor_properties.freecad_object.Shape
+    check_intersect_stats['probes'] += 1
+    # Broad phase : no common volume is possible if bounding boxes do not overlap
+    if not part_shape_transformed.BoundBox.intersect(tab_to_add_transformed.BoundBox):
+        check_intersect_stats['skipped'] += 1
+        return False, tab_to_add_transformed
     #print "volume %f" % part_shape_transformed.common(tab_to_add_transformed).Volume
     return part_shape_transformed.common(tab_to_add_transformed).Volume > 0.001, tab_to_add_transformed
 
 
+# Fraction of each probe box dimension kept between the sampled corners and the box faces, so
+# that a probe flush with a face of the interactor is not classified on that face
+PROBE_SAMPLE_MARGIN = 0.1
+
+
+def get_probe_sample_points(length, width, height, position):
+    points = [position + FreeCAD.Vector(length / 2.0, width / 2.0, height / 2.0)]
+    for x in (length * PROBE_SAMPLE_MARGIN, length * (1. - PROBE_SAMPLE_MARGIN)):
+        for y in (width * PROBE_SAMPLE_MARGIN, width * (1. - PROBE_SAMPLE_MARGIN)):
+            for z in (height * PROBE_SAMPLE_MARGIN, height * (1. - PROBE_SAMPLE_MARGIN)):
+                points.append(position + FreeCAD.Vector(x, y, z))
+    return points
+
+
+# Distance between the probe and the interactor above which they have no common volume
+PROBE_CONTACT_TOLERANCE = 1e-7
+
+
+# Point version of check_intersect for the small kerf probe boxes. The center and the corners
+# (pulled inward) of the box are placed on the face and classified against the interactor solid.
+# When they are all inside the probe is inside the material. When they are all outside, the
+# interactor may still enter the band between the corners and the box faces : the probe is
+# outside only if it does not reach the interactor. Otherwise the boolean common() decides.
+@instrumentation.timed("kerf probes")
+def check_box_intersect(length, width, height, position, face, part_interactor_properties):
+    part_shape = part_interactor_properties.freecad_object.Shape
+    vertexes = Part.makeCompound([Part.Vertex(point)
+                                  for point in get_probe_sample_points(length, width, height, position)])
+    vertexes = transform_part(vertexes, face)
+    check_intersect_stats['classified'] += 1
+    bound_box = part_shape.BoundBox
+    results = set(bound_box.isInside(vertex.Point) and part_shape.isInside(vertex.Point, 1e-7, True)
+                  for vertex in vertexes.Vertexes)
+    if results == {True}:
+        return True
+    box = transform_part(make_cached_box(length, width, height, position), face)
+    if results == {False} and (not bound_box.intersect(box.BoundBox)
+                               or part_shape.distToShape(box)[0] > PROBE_CONTACT_TOLERANCE):
+        return False
+    check_intersect_stats['fallbacks'] += 1
+    return part_shape.common(box).Volume > 0.001
+
+
+@instrumentation.timed("transforms")
 def transform(part, referentiel_face, transform_matrix=None, y_invert = False):
     normal_face = referentiel_face.normalAt(0, 0)
     # original center is (0,0,0)
     transformed_center = referentiel_face.CenterOfMass #+ normal_face.normalize() * x_origin
     if transform_matrix is None:
         transform_matrix = get_matrix_transform(referentiel_face)
+    elif not isinstance(transform_matrix, FreeCAD.Matrix):
+        transform_matrix = tuple_to_matrix(transform_matrix)
     part.Placement = FreeCAD.Placement(transform_matrix).multiply(part.Placement)
     part.translate(transformed_center)
     if y_invert:
         part.rotate(transformed_center, normal_face, 180.)
     return part
 
+
+# Local frames and placement matrices of the faces, computed once per face. Keys are the face
+# hash code and its fingerprint, so a face changed by a recompute gets a new entry.
+FACE_FRAME_CACHE_SIZE = 1024
+face_frame_cache = {}
+
+
+def face_fingerprint(face):
+    return ";".join("%.*f,%.*f,%.*f" % (PRIMITIVE_PRECISION, vertex.Point.x, PRIMITIVE_PRECISION, vertex.Point.y,
+                                        PRIMITIVE_PRECISION, vertex.Point.z)
+                    for vertex in face.Vertexes)
+
+
+def clear_face_frame_cache():
+    face_frame_cache.clear()
+
+
+@instrumentation.timed("local frames")
+def get_face_frame(face):
+    key = (face.hashCode(), face_fingerprint(face))
+    frame = face_frame_cache.get(key)
+    if frame is None:
+        local_axis = compute_local_axis(face)
+        if local_axis[0] is None:
+            return local_axis, None
+        frame = (local_axis, matrix_to_tuple(compute_matrix_transform(local_axis)))
+        if len(face_frame_cache) >= FACE_FRAME_CACHE_SIZE:
+            face_frame_cache.clear()
+        face_frame_cache[key] = frame
+    return frame
+
+
+def make_fingerprint(*values):
+    digest = hashlib.sha1()
+    for value in values:
+        digest.update(value.encode('utf-8'))
+        digest.update(b'|')
+    return digest.hexdigest()
+
+
+# Fingerprint of the values of ObjectProperties, FreeCAD objects and faces are left out
+def properties_fingerprint(properties, excluded_keys=()):
+    values = dict((key, value) for key, value in properties.__dict__.items()
+                  if not key.startswith('freecad_') and key not in excluded_keys)
+    return make_fingerprint(json.dumps(values, sort_keys=True, default=repr))
+
+
+# Fingerprint of the geometry of a shape, stable between two recomputes of the same shape
+def shape_fingerprint(shape):
+    bound_box = shape.BoundBox
+    values = [shape.Volume, shape.Area, bound_box.XMin, bound_box.YMin, bound_box.ZMin,
+              bound_box.XMax, bound_box.YMax, bound_box.ZMax]
+    for vertex in shape.Vertexes:
+        values.extend((vertex.Point.x, vertex.Point.y, vertex.Point.z))
+    return make_fingerprint("%d,%d,%d" % (len(shape.Faces), len(shape.Edges), len(shape.Vertexes)),
+                            ",".join("%.*f" % (PRIMITIVE_PRECISION, value) for value in values))
+
+
+# Matrices are kept as tuples of 16 floats, which can be stored in the document properties
+def matrix_to_tuple(matrix):
+    return tuple(getattr(matrix, "A%d%d" % (row, column)) for row in range(1, 5) for column in range(1, 5))
+
+
+def tuple_to_matrix(values):
+    return FreeCAD.Matrix(*values)
+
+
 # http://gamedev.stackexchange.com/questions/20097/how-to-calculate-a-3x3-rotation-matrix-from-2-direction-vectors
 # http://www.freecadweb.org/api/Vector.html
 def get_matrix_transform(face):
-    x_local, y_local_not_normalized, z_local_not_normalized = get_local_axis(face)
+    matrix_values = get_face_frame(face)[1]
+    if matrix_values is None:
+        raise ValueError("Error computing local axis")
+    return tuple_to_matrix(matrix_values)
+
+
+def compute_matrix_transform(local_axis):
+    x_local, y_local_not_normalized, z_local_not_normalized = local_axis
+    y_local_not_normalized = FreeCAD.Vector(y_local_not_normalized)
+    z_local_not_normalized = FreeCAD.Vector(z_local_not_normalized)
     y_local = y_local_not_normalized.normalize()
     z_local = z_local_not_normalized.normalize()
 
@@ -167,6 +357,13 @@ def get_matrix_transform(face):
 
 
 def get_local_axis(face):
+    local_axis = get_face_frame(face)[0]
+    if local_axis[0] is None:
+        return local_axis
+    return tuple(FreeCAD.Vector(vector) for vector in local_axis)
+
+
+def compute_local_axis(face):
     list_edges = Part.__sortEdges__(face.Edges)
     list_points = sort_quad_vertex(list_edges, False)
     if list_points is None:
@@ -263,6 +460,12 @@ def biggest_area_faces(freecad_shape):
     return biggest_area_face
 
 
+# Minimum and maximum positions of the shape along the normal
+def get_extent(shape, normal):
+    positions = [vertex.Point.dot(normal) for vertex in shape.Vertexes]
+    return min(positions), max(positions)
+
+
 def smallest_area_faces(freecad_shape):
     sorted_list = sort_area_shape_faces(freecad_shape)
     smallest_area_face = sorted_list[0]
@@ -279,27 +482,54 @@ def sort_area_shape_list(faces_list):
     return sort_area_face_common(faces_list, compare_freecad_vector)
 
 
+# Normals are grouped in a grid of cells bigger than the tolerance of compare_freecad_vector and
+# compare_freecad_vector_direction, so a face normal is only tested against the groups of its cell
+# and the neighbour ones. Groups are registered for both directions of their normal.
+NORMAL_CELL_SIZE = 10e-4
+NORMAL_NEIGHBOUR_OFFSETS = list(itertools.product((-1, 0, 1), repeat=3))
+
+
+def get_normal_cell(normal):
+    return (int(math.floor(normal.x / NORMAL_CELL_SIZE)), int(math.floor(normal.y / NORMAL_CELL_SIZE)),
+            int(math.floor(normal.z / NORMAL_CELL_SIZE)))
+
+
 def sort_area_face_common(faces, test_function=compare_freecad_vector_direction):
     normal_area_list = []
+    normal_cells = {}
+    # Other test functions may have a bigger tolerance than the cells
+    scan_on_miss = test_function not in (compare_freecad_vector, compare_freecad_vector_direction)
     for face in faces:
         try:
             # print face
             normal = face.normalAt(0, 0)
             # print normal
-            found = False
-            for i in range(len(normal_area_list)):
-                normal_test = normal_area_list[i][0]
-                if test_function(normal, normal_test):
-                    found = True
-                    normal_area_list[i][1] += face.Area
-                    normal_area_list[i][2].append(face)
-                    tmp = sorted(normal_area_list[i][2], key=attrgetter('Area'),  reverse=True)
-                    normal_area_list[i][2] = tmp
-                    break
-            if not found:
+            x, y, z = get_normal_cell(normal)
+            # first group created matching the normal, as the former linear search
+            found_index = None
+            for dx, dy, dz in NORMAL_NEIGHBOUR_OFFSETS:
+                for index in normal_cells.get((x + dx, y + dy, z + dz), []):
+                    if (found_index is None or index < found_index) \
+                            and test_function(normal, normal_area_list[index][0]):
+                        found_index = index
+            if found_index is None and scan_on_miss:
+                for index in range(len(normal_area_list)):
+                    if test_function(normal, normal_area_list[index][0]):
+                        found_index = index
+                        break
+            if found_index is not None:
+                normal_area_list[found_index][1] += face.Area
+                normal_area_list[found_index][2].append(face)
+            else:
                 normal_area_list.append([normal, face.Area, [face]])
+                index = len(normal_area_list) - 1
+                normal_cells.setdefault((x, y, z), []).append(index)
+                normal_cells.setdefault(get_normal_cell(normal * -1.), []).append(index)
         except Exception as ex:
             FreeCAD.Console.PrintError("Something wrong with face ", face, " : ", ex)
+    # stable sort once per group keeps the order of the faces of same area
+    for normal_area in normal_area_list:
+        normal_area[2] = sorted(normal_area[2], key=attrgetter('Area'), reverse=True)
     # print normal_area_list
     sorted_list = sorted(normal_area_list, key=itemgetter(1))
     return sorted_list
@@ -318,22 +548,14 @@ def check_limit_z(tab_face, width, pos_y, material_face, material_plane):
     box_y_size = width / 2.0
     box_z_size = 0.1
 
-    box_z_plus = Part.makeBox(box_x_size, box_y_size, box_z_size)
-    box_z_plus.translate(FreeCAD.Vector(0.005, pos_y - box_y_size/2.0, material_face.thickness / 2.0))
-
-    box_z_minus = Part.makeBox(box_x_size, box_y_size, box_z_size)
-    box_z_minus.translate(FreeCAD.Vector(0.005, pos_y - box_y_size/2.0, -box_z_size - material_face.thickness / 2.0))
-
-    z_plus_inside, toto1 = check_intersect(box_z_plus, tab_face, material_plane)
-    z_minus_inside, toto2 = check_intersect(box_z_minus, tab_face, material_plane)
-
-    #shapeobj = FreeCAD.ActiveDocument.addObject("Part::Feature","tstupdds_plus")
-    #shapeobj.Shape = toto1
-    #FreeCAD.ActiveDocument.recompute()
-
-    #shapeobj = FreeCAD.ActiveDocument.addObject("Part::Feature","tstupddsd_minus")
-    #shapeobj.Shape = toto2
-    #FreeCAD.ActiveDocument.recompute()
+    z_plus_inside = check_box_intersect(box_x_size, box_y_size, box_z_size,
+                                        FreeCAD.Vector(0.005, pos_y - box_y_size/2.0,
+                                                       material_face.thickness / 2.0),
+                                        tab_face, material_plane)
+    z_minus_inside = check_box_intersect(box_x_size, box_y_size, box_z_size,
+                                         FreeCAD.Vector(0.005, pos_y - box_y_size/2.0,
+                                                        -box_z_size - material_face.thickness / 2.0),
+                                         tab_face, material_plane)
     #print("z plus %r, minus %r" % (z_plus_inside, z_minus_inside))
 
     return z_plus_inside, z_minus_inside
@@ -344,22 +566,12 @@ def check_limit_y(tab_face, height, pos_y, width, material_plane):
     box_y_size = 0.1
     box_z_size = height / 2.0
 
-    box_y_minus = Part.makeBox(box_x_size, box_y_size, box_z_size)
-    box_y_minus.translate(FreeCAD.Vector(0.005, pos_y - width/2.0 - box_y_size, -box_z_size / 2.0))
-
-    box_y_plus = Part.makeBox(box_x_size, box_y_size, box_z_size)
-    box_y_plus.translate(FreeCAD.Vector(0.005, pos_y + width/2.0, -box_z_size / 2.0))
-
-    y_plus_inside, toto1 = check_intersect(box_y_plus, tab_face, material_plane)
-    y_minus_inside, toto2 = check_intersect(box_y_minus, tab_face, material_plane)
-
-    #shapeobj = FreeCAD.ActiveDocument.addObject("Part::Feature","y_plus_inside")
-    #shapeobj.Shape = toto1
-    #FreeCAD.ActiveDocument.recompute()
-
-    #shapeobj = FreeCAD.ActiveDocument.addObject("Part::Feature","y_minus_inside")
-    #shapeobj.Shape = toto2
-    #FreeCAD.ActiveDocument.recompute()
+    y_plus_inside = check_box_intersect(box_x_size, box_y_size, box_z_size,
+                                        FreeCAD.Vector(0.005, pos_y + width/2.0, -box_z_size / 2.0),
+                                        tab_face, material_plane)
+    y_minus_inside = check_box_intersect(box_x_size, box_y_size, box_z_size,
+                                         FreeCAD.Vector(0.005, pos_y - width/2.0 - box_y_size, -box_z_size / 2.0),
+                                         tab_face, material_plane)
     #print("y plus %r, minus %r" % (y_plus_inside, y_minus_inside))
 
     return y_plus_inside, y_minus_inside
@@ -370,22 +582,13 @@ def check_limit_y_on_for_tab(tab_face, height, pos_y, width, thickness, material
     box_y_size = 0.1
     box_z_size = height / 2.0
 
-    box_y_minus = Part.makeBox(box_x_size, box_y_size, box_z_size)
-    box_y_minus.translate(FreeCAD.Vector(-0.005 - box_x_size, pos_y - width/2.0 - box_y_size, -box_z_size / 2.0))
-
-    box_y_plus = Part.makeBox(box_x_size, box_y_size, box_z_size)
-    box_y_plus.translate(FreeCAD.Vector(-0.005 - box_x_size, pos_y + width/2.0, -box_z_size / 2.0))
-
-    y_plus_inside, toto1 = check_intersect(box_y_plus, tab_face, material_face)
-    y_minus_inside, toto2 = check_intersect(box_y_minus, tab_face, material_face)
-
-    #shapeobj = FreeCAD.ActiveDocument.addObject("Part::Feature","y_plus_inside")
-    #shapeobj.Shape = toto1
-    #FreeCAD.ActiveDocument.recompute()
-
-    #shapeobj = FreeCAD.ActiveDocument.addObject("Part::Feature","y_minus_inside")
-    #shapeobj.Shape = toto2
-    #FreeCAD.ActiveDocument.recompute()
+    y_plus_inside = check_box_intersect(box_x_size, box_y_size, box_z_size,
+                                        FreeCAD.Vector(-0.005 - box_x_size, pos_y + width/2.0, -box_z_size / 2.0),
+                                        tab_face, material_face)
+    y_minus_inside = check_box_intersect(box_x_size, box_y_size, box_z_size,
+                                         FreeCAD.Vector(-0.005 - box_x_size, pos_y - width/2.0 - box_y_size,
+                                                        -box_z_size / 2.0),
+                                         tab_face, material_face)
     #print("y plus %r, minus %r" % (y_plus_inside, y_minus_inside))
 
     return y_plus_inside, y_minus_inside
@@ -423,9 +626,8 @@ def tab_join_create_hole_on_plane(tab_face, width, pos_y, material_face, materia
         corrected_height -= material_plane.laser_beam_diameter / 2.0
         corrected_height_center = (corrected_height + material_plane.laser_beam_diameter / 2.0) / 2.0
 
-    origin = FreeCAD.Vector(0., - corrected_width_center, -corrected_height_center)
-    hole = Part.makeBox(corrected_length, corrected_width, corrected_height, origin)
-    hole.translate(FreeCAD.Vector(0, pos_y, 0))
+    origin = FreeCAD.Vector(0., pos_y - corrected_width_center, -corrected_height_center)
+    hole = make_cached_box(corrected_length, corrected_width, corrected_height, origin)
 
     if dog_bone:
         hole = make_dog_bone_on_limits_on_yz(hole, corrected_length,
@@ -453,12 +655,12 @@ def make_dog_bone_on_limits_on_yz(shape, length,
 
 
 def make_dog_bone_on_xy(pos_x, pos_y, height, radius):
-    cylinder = Part.makeCylinder(radius, height, FreeCAD.Vector(pos_x, pos_y, -height / 2.0), FreeCAD.Vector(0, 0, 1))
+    cylinder = make_cached_cylinder(radius, height, FreeCAD.Vector(pos_x, pos_y, -height / 2.0), FreeCAD.Vector(0, 0, 1))
     return cylinder
 
 
 def make_dog_bone_on_yz(pos_y, pos_z, height, radius):
-    cylinder = Part.makeCylinder(radius, height, FreeCAD.Vector(0, pos_y, pos_z), FreeCAD.Vector(1., 0, 0))
+    cylinder = make_cached_cylinder(radius, height, FreeCAD.Vector(0, pos_y, pos_z), FreeCAD.Vector(1., 0, 0))
     return cylinder
 
 
@@ -486,6 +688,23 @@ def assemble_list_element(el_list):
     return part
 
 
+# Fuse all shapes to add and cut all shapes to remove with a single multi-argument boolean each,
+# instead of rebuilding the intermediate shape for every element. With the profile engine, sheet
+# parts are made from their section and only the others use the 3D booleans.
+@instrumentation.timed("fuse/cut")
+def fuse_cut_shapes(shape, to_add, to_remove, engine=preferences.JOIN_ENGINE_SOLID):
+    if engine == preferences.JOIN_ENGINE_PROFILE:
+        profile_shape = profile.fuse_cut_profiles(shape, to_add, to_remove)
+        if profile_shape is not None:
+            return profile_shape
+        FreeCAD.Console.PrintLog("Part is not a sheet with through shapes, 3D booleans are used\n")
+    if len(to_add) > 0:
+        shape = shape.multiFuse(to_add)
+    if len(to_remove) > 0:
+        shape = shape.cut(to_remove)
+    return shape
+
+
 #Use this function only for preview
 # See Warning at https://www.freecadweb.org/wiki/Part_MakeCompound :
 # "A compound containing pieces that intersect or touch is invalid
@@ -498,9 +717,55 @@ def assemble_list_element_fast(el_list):
     return Part.makeCompound(el_list)
 
 
+def distance_point_to_bound_box(point, bound_box):
+    dx = max(bound_box.XMin - point.x, 0., point.x - bound_box.XMax)
+    dy = max(bound_box.YMin - point.y, 0., point.y - bound_box.YMax)
+    dz = max(bound_box.ZMin - point.z, 0., point.z - bound_box.ZMax)
+    return math.sqrt(dx * dx + dy * dy + dz * dz)
+
+
+# Uniform grid over the bounding boxes of material elements. It is built once per run and
+# returns the elements near a region, nearest first, instead of scanning all of them.
+class MaterialElementIndex:
+    def __init__(self, elements):
+        self.elements = elements
+        self.bound_boxes = [element.properties.freecad_object.Shape.BoundBox for element in elements]
+        self.cells = {}
+        self.cell_size = 1.
+        if len(self.bound_boxes) > 0:
+            # median of the parts biggest dimension : a part spans only a few cells
+            sizes = sorted([max(box.XLength, box.YLength, box.ZLength) for box in self.bound_boxes])
+            self.cell_size = max(sizes[len(sizes) // 2], 10e-3)
+        for index, bound_box in enumerate(self.bound_boxes):
+            for key in self.get_cells(bound_box):
+                self.cells.setdefault(key, []).append(index)
+
+    def get_cells(self, bound_box):
+        x_min, y_min, z_min = [int(math.floor(v / self.cell_size))
+                               for v in (bound_box.XMin, bound_box.YMin, bound_box.ZMin)]
+        x_max, y_max, z_max = [int(math.floor(v / self.cell_size))
+                               for v in (bound_box.XMax, bound_box.YMax, bound_box.ZMax)]
+        for x in range(x_min, x_max + 1):
+            for y in range(y_min, y_max + 1):
+                for z in range(z_min, z_max + 1):
+                    yield (x, y, z)
+
+    def query(self, bound_box, point=None):
+        candidates = set()
+        for key in self.get_cells(bound_box):
+            candidates.update(self.cells.get(key, []))
+        found = [index for index in candidates if self.bound_boxes[index].intersect(bound_box)]
+        if point is None:
+            found.sort()
+        else:
+            found.sort(key=lambda index: (distance_point_to_bound_box(point, self.bound_boxes[index]), index))
+        return [self.elements[index] for index in found]
+
+
 class MaterialElement:
-    def __init__(self, properties):
+    def __init__(self, properties, engine=preferences.JOIN_ENGINE_SOLID):
         self.properties = properties
+        self.engine = engine
         self.toAdd = []
         self.toRemove = []
 
@@ -514,15 +779,32 @@ class MaterialElement:
     def get_new_name(self):
         return self.properties.new_name
 
+    @instrumentation.timed("part assembly")
     def get_shape(self, fast_assemble=False):
-        if not fast_assemble:
-            part = assemble_list_element(self.toAdd)
-        else:
-            part = assemble_list_element_fast(self.toAdd)
         new_shape = self.properties.freecad_object.Shape
+        if not fast_assemble:
+            return fuse_cut_shapes(new_shape, self.toAdd, self.toRemove, self.engine)
+        part = assemble_list_element_fast(self.toAdd)
         if part is not None:
             new_shape = new_shape.fuse(part)
-        part = assemble_list_element(self.toRemove)
-        if part is not None:
-            new_shape = new_shape.cut(part)
+        if len(self.toRemove) > 0:
+            new_shape = new_shape.cut(self.toRemove)
         return new_shape
+
+
+# Final shapes of the material elements. When the parallel assembly option is enabled, each
+# fuse/cut runs in a FreeCADCmd worker process and shapes are returned in the same order.
+@instrumentation.timed("assembly")
+def get_elements_shapes(parts_element):
+    if preferences.parallel_assembly() and len(parts_element) > 1:
+        if workerpool.is_available():
+            jobs = []
+            for element in parts_element:
+                jobs.append(("lasercut.helper.fuse_cut_shapes",
+                             {'shape': element.properties.freecad_object.Shape,
+                              'to_add': element.toAdd, 'to_remove': element.toRemove,
+                              'engine': element.engine}))
+            results = workerpool.run_jobs_or_raise(jobs)
+            return [result[workerpool.RESULT_KEY] for result in results]
+        FreeCAD.Console.PrintWarning("FreeCADCmd executable not found, parts are assembled sequentially\n")
+    return [element.get_shape() for element in parts_element]
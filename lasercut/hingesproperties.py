@@ -24,8 +24,8 @@
 
 import FreeCAD
 from lasercut import helper
-from lasercut.material import retrieve_thickness_from_biggest_face
-from lasercut.makehinges import complete_hinges_properties, create_solid_corner, estimate_min_link
+from lasercut.material import retrieve_thickness
+from lasercut.makehinges import complete_hinges_properties, estimate_min_link
 import copy
 
 
@@ -80,14 +80,15 @@ class HingesProperties(helper.ObjectProperties):
         self.freecad_object_2 = freecad_object_2
         self.freecad_face_2 = freecad_face_2
         complete_hinges_properties(self, freecad_face_1, freecad_face_2, True)
-        create_solid_corner(self)
+        # The solid corner is only made if the solid preview is generated, see create_linked_solid
+        self.solid = None
 
 class GlobalLivingMaterialProperties(helper.ObjectProperties):
 
     _allowed = ('new_name', 'thickness', 'laser_beam_diameter', 'freecad_object_name',
                 'freecad_object_label'
                 'generate_solid', 'dog_bone', 'link_clearance', 'solid_name',
-                'hinge_type', "alternate_nb_hinge", "occupancy_ratio")
+                'hinge_type', "alternate_nb_hinge", "occupancy_ratio", 'generate_pattern')
 
     HINGE_TYPE_ALTERNATE_DOUBLE = "Alternate"
 
@@ -98,7 +99,7 @@ class GlobalLivingMaterialProperties(helper.ObjectProperties):
         if not hasattr(self, 'thickness'):
             self.thickness = 5.0
             try:
-                self.thickness = retrieve_thickness_from_biggest_face(kwargs['freecad_object'])
+                self.thickness = retrieve_thickness(kwargs['freecad_object'])
                 # FreeCAD.Console.PrintError("found : %f\n" % self.thickness)
             except ValueError as e:
                 FreeCAD.Console.PrintError(e)
@@ -122,6 +123,8 @@ class GlobalLivingMaterialProperties(helper.ObjectProperties):
             self.dog_bone = False
         if not hasattr(self, 'generate_solid'):
             self.generate_solid = True
+        if not hasattr(self, 'generate_pattern'):
+            self.generate_pattern = False
         if not hasattr(self, 'hinge_type'):
             self.hinge_type = self.HINGE_TYPE_ALTERNATE_DOUBLE
         if not hasattr(self, 'alternate_nb_hinge'):
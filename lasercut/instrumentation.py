@@ -0,0 +1,161 @@
+#!/usr/bin/env python
+
+# ***************************************************************************
+# *                                                                         *
+# *   Copyright (c) 2016 execuc                                             *
+# *                                                                         *
+# *   This file is part of LCInterlocking module.                           *
+# *   LCInterlocking module is free software; you can redistribute it and/or*
+# *   modify it under the terms of the GNU Lesser General Public            *
+# *   License as published by the Free Software Foundation; either          *
+# *   version 2.1 of the License, or (at your option) any later version.    *
+# *                                                                         *
+# *   This module is distributed in the hope that it will be useful,       *
+# *   but WITHOUT ANY WARRANTY; without even the implied warranty of        *
+# *   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU     *
+# *   Lesser General Public License for more details.                       *
+# *                                                                         *
+# *   You should have received a copy of the GNU Lesser General Public      *
+# *   License along with this library; if not, write to the Free Software   *
+# *   Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston,            *
+# *   MA  02110-1301  USA                                                   *
+# *                                                                         *
+# ***************************************************************************
+
+
+# Opt-in timing of the joins pipeline. Functions decorated with timed(stage) and blocks run in a
+# stage(name) context add their wall time and a call to the stage, and to the current tab when
+# they run inside a tab_scope. Times are inclusive : a stage called by another one is counted in
+# both. When the instrumentation is not started, decorated functions only test a flag.
+
+import time
+import json
+import functools
+import FreeCAD
+from lasercut import preferences
+
+state = {'enabled': False, 'tab': None}
+# Stage name -> [calls, seconds]
+stages = {}
+# Tab name -> stage name -> [calls, seconds]
+tabs = {}
+# Counters dictionaries of the modules, added to the report as they are
+counters = {}
+
+
+def start():
+    stages.clear()
+    tabs.clear()
+    state['tab'] = None
+    state['enabled'] = preferences.instrumentation()
+    return state['enabled']
+
+
+def is_enabled():
+    return state['enabled']
+
+
+def register_counters(name, values):
+    counters[name] = values
+
+
+def add_time(name, duration):
+    entries = [stages]
+    if state['tab'] is not None:
+        entries.append(tabs.setdefault(state['tab'], {}))
+    for entry in entries:
+        stats = entry.setdefault(name, [0, 0.])
+        stats[0] += 1
+        stats[1] += duration
+
+
+def timed(name):
+    def decorator(function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            if not state['enabled']:
+                return function(*args, **kwargs)
+            begin = time.time()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                add_time(name, time.time() - begin)
+        return wrapper
+    return decorator
+
+
+class stage(object):
+    def __init__(self, name):
+        self.name = name
+        self.begin = None
+
+    def __enter__(self):
+        if state['enabled']:
+            self.begin = time.time()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if self.begin is not None:
+            add_time(self.name, time.time() - self.begin)
+        return False
+
+
+# Stages run inside are also counted for the tab
+class tab_scope(stage):
+    def __init__(self, tab_name):
+        super(tab_scope, self).__init__("tab")
+        self.tab_name = tab_name
+        self.previous_tab = None
+
+    def __enter__(self):
+        self.previous_tab = state['tab']
+        if state['enabled']:
+            state['tab'] = self.tab_name
+        return super(tab_scope, self).__enter__()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        result = super(tab_scope, self).__exit__(exc_type, exc_value, traceback)
+        state['tab'] = self.previous_tab
+        return result
+
+
+def get_stages_report(entries):
+    return dict((name, {'calls': stats[0], 'time': stats[1]}) for name, stats in entries.items())
+
+
+def get_report():
+    return {'stages': get_stages_report(stages),
+            'tabs': dict((tab_name, get_stages_report(entries)) for tab_name, entries in tabs.items()),
+            'counters': dict((name, dict(values)) for name, values in counters.items())}
+
+
+def format_stages(entries):
+    lines = []
+    for name, stats in sorted(entries.items(), key=lambda item: -item[1][1]):
+        lines.append("  %-28s %8d %10.3f\n" % (name, stats[0], stats[1]))
+    return lines
+
+
+def print_report():
+    lines = ["Stage timing (inclusive)\n", "  %-28s %8s %10s\n" % ("stage", "calls", "seconds")]
+    lines.extend(format_stages(stages))
+    for tab_name in sorted(tabs.keys()):
+        lines.append("Tab %s\n" % tab_name)
+        lines.extend(format_stages(tabs[tab_name]))
+    for name in sorted(counters.keys()):
+        lines.append("Counters %s : %s\n" % (name, json.dumps(counters[name], sort_keys=True)))
+    FreeCAD.Console.PrintMessage("".join(lines))
+
+
+# Print the report or write it in the JSON file set in the preferences, then stop the recording
+def finish():
+    if not state['enabled']:
+        return
+    state['enabled'] = False
+    path = preferences.instrumentation_report_path()
+    if path:
+        with open(path, "w") as report_file:
+            json.dump(get_report(), report_file, indent=2, sort_keys=True)
+        FreeCAD.Console.PrintMessage("Stage timing written in %s\n" % path)
+    else:
+        print_report()
@@ -22,11 +22,11 @@
 # *                                                                         *
 # ***************************************************************************
 
-import Part
 import FreeCAD
-from panel.tab import TabProperties
+from lasercut.tabproperties import TabProperties
 import lasercut.flextab as flextab
 import lasercut.helper as helper
+from lasercut import shapecache, instrumentation, preferences
 
 
 def get_slot_positions(tab_properties):
@@ -65,9 +65,8 @@ def get_slot_positions(tab_properties):
 def screw_way_on_plane(material_plane, screw_nut_spec, pos_y):
     # horizontal hole
     radius = (screw_nut_spec.screw_diameter * 1.2 - material_plane.laser_beam_diameter) / 2.0
-    cylinder = Part.makeCylinder(radius, material_plane.thickness, FreeCAD.Vector(0, 0, -material_plane.thickness / 2.))
-    cylinder.rotate(FreeCAD.Vector(0, 0, 0), FreeCAD.Vector(0, 1, 0), 90)
-    cylinder.translate(FreeCAD.Vector(material_plane.thickness / 2.0, pos_y, 0.))
+    cylinder = helper.make_cached_cylinder(radius, material_plane.thickness, FreeCAD.Vector(0, pos_y, 0.),
+                                           FreeCAD.Vector(1, 0, 0))
     return cylinder
 
 
@@ -77,9 +76,9 @@ def screw_way_on_face(material_face, material_plane, screw_nut_spec, pos_y, dog_
                             + material_plane.thickness_tolerance + screw_nut_spec.screw_length_tol
     corrected_width = screw_nut_spec.screw_diameter * 1.2 - material_face.laser_beam_diameter
     corrected_height = material_face.thickness  # + materialFace.tolerance
-    screw_hole = Part.makeBox(vert_corrected_length, corrected_width, corrected_height,
-                              FreeCAD.Vector(0.,
-                                             -corrected_width / 2.0, -corrected_height / 2.0))
+    screw_hole = helper.make_cached_box(vert_corrected_length, corrected_width, corrected_height,
+                                        FreeCAD.Vector(0.,
+                                                       -corrected_width / 2.0, -corrected_height / 2.0))
     if dog_bone:
         screw_hole = helper.make_dog_bone_on_limits_on_xy(screw_hole, corrected_height, True)
     x_pos = -vert_corrected_length
@@ -87,9 +86,9 @@ def screw_way_on_face(material_face, material_plane, screw_nut_spec, pos_y, dog_
     # Nut hole
     corrected_length = screw_nut_spec.nut_height - material_face.laser_beam_diameter + 0.1
     corrected_width = screw_nut_spec.nut_flat_flat - material_face.laser_beam_diameter + 0.1
-    nut_hole = Part.makeBox(corrected_length, corrected_width, corrected_height,
-                            FreeCAD.Vector(0,
-                                           -corrected_width / 2.0, -corrected_height / 2.0))
+    nut_hole = helper.make_cached_box(corrected_length, corrected_width, corrected_height,
+                                      FreeCAD.Vector(0,
+                                                     -corrected_width / 2.0, -corrected_height / 2.0))
     x_pos = -vert_corrected_length + screw_nut_spec.nut_height + screw_nut_spec.screw_length_tol
     nut_hole.translate(FreeCAD.Vector(x_pos, pos_y, 0))
     if dog_bone:
@@ -131,9 +130,8 @@ def tab_join_create_tab_on_face(material_face, material_plane, width, pos_y, tab
         corrected_width_center = (corrected_width - material_face.laser_beam_diameter / 2.0) / 2.0
 
     #origin = FreeCAD.Vector(-corrected_length / 2.0, -corrected_width_center, -corrected_height / 2.0)
-    origin = FreeCAD.Vector(0., -corrected_width_center, -corrected_height / 2.0)
-    tab = Part.makeBox(corrected_length, corrected_width, corrected_height, origin)
-    tab.translate(FreeCAD.Vector(0, pos_y, 0))
+    origin = FreeCAD.Vector(0., pos_y - corrected_width_center, -corrected_height / 2.0)
+    tab = helper.make_cached_box(corrected_length, corrected_width, corrected_height, origin)
 
     hole = None
     left_hole = None
@@ -142,14 +140,15 @@ def tab_join_create_tab_on_face(material_face, material_plane, width, pos_y, tab
     if dog_bone:
         radius = min(corrected_width, corrected_length) * 2 / 30.
         if y_minus_inside:
-            left_hole = Part.makeCylinder(radius, corrected_height,
-                                          FreeCAD.Vector(0, -corrected_width_center + pos_y, -corrected_height / 2.0),
-                                          FreeCAD.Vector(0, 0, 1.))
+            left_hole = helper.make_cached_cylinder(radius, corrected_height,
+                                                    FreeCAD.Vector(0, -corrected_width_center + pos_y,
+                                                                   -corrected_height / 2.0),
+                                                    FreeCAD.Vector(0, 0, 1.))
         if y_plus_inside:
-            right_hole = Part.makeCylinder(radius, corrected_height,
-                                           FreeCAD.Vector(0, -corrected_width_center + corrected_width + pos_y,
-                                           -corrected_height / 2.0),
-                                           FreeCAD.Vector(0, 0, 1.))
+            right_hole = helper.make_cached_cylinder(radius, corrected_height,
+                                                     FreeCAD.Vector(0, -corrected_width_center + corrected_width + pos_y,
+                                                                    -corrected_height / 2.0),
+                                                     FreeCAD.Vector(0, 0, 1.))
         hole = left_hole
         if hole and right_hole:
             hole = hole.fuse(right_hole)
@@ -159,6 +158,7 @@ def tab_join_create_tab_on_face(material_face, material_plane, width, pos_y, tab
     return tab, hole
 
 
+@instrumentation.timed("tab construction")
 def make_tab_join(tab, tab_part, other_parts):
     slots_pos = get_slot_positions(tab)
     for i, y in enumerate(slots_pos):
@@ -179,6 +179,7 @@ def make_tab_join(tab, tab_part, other_parts):
     return
 
 
+@instrumentation.timed("continuous tab construction")
 def make_continuous_tab_joins(tab, tab_part, other_parts):
     tabs_number = int(tab.tabs_number - 1)
     virtual_tab_length = float(tab.y_length / float(int(tabs_number + 1)))
@@ -209,6 +210,7 @@ def make_continuous_tab_joins(tab, tab_part, other_parts):
     return
 
 
+@instrumentation.timed("t-slot construction")
 def make_tslot_tab_join(tab, tab_part, other_parts):
     half_tab_distance = (tab.screw_diameter * tab.half_tab_ratio) + tab.tabs_width / 2.0
     screw_nut_spec = helper.get_screw_nut_spec(tab.screw_diameter, tab.screw_length)
@@ -259,38 +261,190 @@ def make_tslot_tab_join(tab, tab_part, other_parts):
     return
 
 
-def make_tabs_joins(parts, tabs):
-    parts_element = []
-    for part in parts:
-        mat_element = helper.MaterialElement(part)
-        parts_element.append(mat_element)
-
-    removeParts = {}
-    #test to improve speed
-    for tab in tabs:
-        keyid = str(tab.group_id)
-        if keyid not in removeParts:
-            removeParts[keyid] = []
-        removeParts[keyid].append(tab.freecad_object.Name)
-
-    for tab in tabs:
-        tab_part = None
+# Distance around the tab face where an interactor part may be found
+def get_tab_search_margin(tab, max_thickness):
+    margin = 2.0 * max_thickness
+    if tab.tab_type == TabProperties.TYPE_TAB or tab.tab_type == TabProperties.TYPE_T_SLOT:
+        reach = max([abs(y) for y in get_slot_positions(tab)]) + tab.tabs_width / 2.0
+        if tab.tab_type == TabProperties.TYPE_T_SLOT:
+            reach += tab.screw_diameter * tab.half_tab_ratio + tab.tabs_width / 2.0
+        margin += max(0., reach - tab.y_length / 2.0)
+    return margin
+
+
+# Material elements of the parts and the lookup of the parts interacting with each tab
+class TabsJoins:
+    def __init__(self, parts, tabs, engine=None):
+        helper.reset_check_intersect_stats()
+        if engine is None:
+            engine = preferences.join_engine()
+        self.engine = engine
+        self.parts_element = []
+        self.parts_by_name = {}
+        for part in parts:
+            mat_element = helper.MaterialElement(part, engine)
+            self.parts_element.append(mat_element)
+            self.parts_by_name[mat_element.get_name()] = mat_element
+
+        self.parts_index = helper.MaterialElementIndex(self.parts_element)
+        self.max_thickness = 0.
+        for part in parts:
+            self.max_thickness = max(self.max_thickness, part.thickness + part.thickness_tolerance)
+
+        self.removeParts = {}
+        #test to improve speed
+        for tab in tabs:
+            keyid = str(tab.group_id)
+            if keyid not in self.removeParts:
+                self.removeParts[keyid] = []
+            self.removeParts[keyid].append(tab.freecad_object.Name)
+
+    def get_tab_part(self, tab):
+        return self.parts_by_name.get(tab.freecad_object.Name)
+
+    def get_group_parts(self, tab):
+        return self.removeParts[str(tab.group_id)]
+
+    @instrumentation.timed("interactor lookup")
+    def get_other_parts(self, tab):
+        tab_part = self.get_tab_part(tab)
+        group_parts = self.get_group_parts(tab)
         other_parts = []
-        keyid = str(tab.group_id)
-        for part in parts_element:
-            if part.get_name() == tab.freecad_object.Name:
-                tab_part = part
-#            else:
-            elif part.get_name() not in removeParts[keyid]:
+        search_box = tab.freecad_face.BoundBox
+        search_box.enlarge(get_tab_search_margin(tab, self.max_thickness))
+        # nearest parts first so that the probe loops stop on the first candidates
+        for part in self.parts_index.query(search_box, tab.freecad_face.CenterOfMass):
+            if part is not tab_part and part.get_name() not in group_parts:
                 other_parts.append(part)
-        if tab.tab_type == TabProperties.TYPE_TAB:
-            make_tab_join(tab, tab_part, other_parts)
-        elif tab.tab_type == TabProperties.TYPE_T_SLOT:
-            make_tslot_tab_join(tab, tab_part, other_parts)
-        elif tab.tab_type == TabProperties.TYPE_CONTINUOUS:
-            make_continuous_tab_joins(tab, tab_part, other_parts)
-        elif tab.tab_type == TabProperties.TYPE_FLEX:
-            flextab.make_flex_tab_join(tab, tab_part, other_parts)
+        return other_parts
+
+    # Make the joins of one tab and return the names of the parts which received shapes
+    def make_tab_joins(self, tab):
+        with instrumentation.tab_scope(tab.tab_name):
+            tab_part = self.get_tab_part(tab)
+            other_parts = self.get_other_parts(tab)
+            involved_parts = [tab_part] + other_parts
+            sizes = [(len(part.toAdd), len(part.toRemove)) for part in involved_parts]
+            if tab.tab_type == TabProperties.TYPE_TAB:
+                make_tab_join(tab, tab_part, other_parts)
+            elif tab.tab_type == TabProperties.TYPE_T_SLOT:
+                make_tslot_tab_join(tab, tab_part, other_parts)
+            elif tab.tab_type == TabProperties.TYPE_CONTINUOUS:
+                make_continuous_tab_joins(tab, tab_part, other_parts)
+            elif tab.tab_type == TabProperties.TYPE_FLEX:
+                flextab.make_flex_tab_join(tab, tab_part, other_parts)
+            else:
+                raise ValueError("Unknown tab type")
+        return set(part.get_name() for part, size in zip(involved_parts, sizes)
+                   if (len(part.toAdd), len(part.toRemove)) != size)
+
+    def log_stats(self):
+        FreeCAD.Console.PrintLog("Intersection probes : %d, skipped by bounding box : %d\n"
+                                 % (helper.check_intersect_stats['probes'], helper.check_intersect_stats['skipped']))
+        FreeCAD.Console.PrintLog("Kerf probes classified by points : %d, boolean fallbacks : %d\n"
+                                 % (helper.check_intersect_stats['classified'],
+                                    helper.check_intersect_stats['fallbacks']))
+        FreeCAD.Console.PrintLog("Primitive cache : %s\n" % str(helper.primitive_cache_info()))
+
+
+# engine is one of the preferences.JOIN_ENGINE_*, None for the one of the preferences
+def make_tabs_joins(parts, tabs, engine=None):
+    joins = TabsJoins(parts, tabs, engine)
+    for tab in tabs:
+        joins.make_tab_joins(tab)
+    joins.log_stats()
+    return joins.parts_element
+
+
+# Version of the state returned by make_tabs_joins_incremental, a different version forces a full
+# recompute
+JOINS_STATE_VERSION = 1
+
+
+def get_part_fingerprint(part):
+    return helper.make_fingerprint(helper.properties_fingerprint(part),
+                                   helper.shape_fingerprint(part.freecad_object.Shape))
+
+
+# group_id is a session counter : the tab group is identified by the names of its parts
+def get_tab_fingerprint(tab, joins):
+    return helper.make_fingerprint(helper.properties_fingerprint(tab, ('group_id', 'description')),
+                                   helper.face_fingerprint(tab.freecad_face),
+                                   ",".join(sorted(joins.get_group_parts(tab))))
+
+
+# Incremental version of make_tabs_joins. previous_state is the state returned by the last run.
+# Only the tabs whose fingerprint changed, or which are near a changed part, are made again, then
+# the other tabs touching the parts to rebuild.
+# available_parts are the names of the parts whose previous output still exists.
+# Return the material elements, the names of the parts to rebuild and the new state.
+def make_tabs_joins_incremental(parts, tabs, previous_state, available_parts):
+    joins = TabsJoins(parts, tabs)
+    with instrumentation.stage("fingerprints"):
+        parts_fingerprints = dict((part.freecad_object.Name, get_part_fingerprint(part)) for part in parts)
+        tabs_fingerprints = [get_tab_fingerprint(tab, joins) for tab in tabs]
+
+    previous_parts = {}
+    previous_tabs = {}
+    if previous_state and previous_state.get('version') == JOINS_STATE_VERSION \
+            and previous_state.get('engine') == joins.engine:
+        previous_parts = previous_state['parts']
+        previous_tabs = previous_state['tabs']
+
+    changed_parts = set(name for name, fingerprint in parts_fingerprints.items()
+                        if previous_parts.get(name) != fingerprint)
+    changed_parts.update(name for name in previous_parts if name not in parts_fingerprints)
+    dirty_parts = set(name for name in parts_fingerprints
+                      if name in changed_parts or name not in available_parts)
+    for fingerprint, touched_parts in previous_tabs.items():
+        if fingerprint not in tabs_fingerprints:
+            dirty_parts.update(touched_parts)
+
+    pending_tabs = []
+    for index, tab in enumerate(tabs):
+        previous_touched = previous_tabs.get(tabs_fingerprints[index])
+        if previous_touched is None or changed_parts.intersection(previous_touched) \
+                or tab.freecad_object.Name in changed_parts \
+                or any(part.get_name() in changed_parts for part in joins.get_other_parts(tab)):
+            pending_tabs.append(index)
+            if previous_touched is not None:
+                dirty_parts.update(previous_touched)
+
+    # Changed tabs dirty all the parts they touch, unchanged tabs are only made again to complete
+    # the parts to rebuild and leave the shapes of their other parts unchanged
+    touched_by_tab = {}
+    for index in pending_tabs:
+        touched_by_tab[index] = joins.make_tab_joins(tabs[index])
+        dirty_parts.update(touched_by_tab[index])
+    for index in range(len(tabs)):
+        if index not in touched_by_tab \
+                and dirty_parts.intersection(previous_tabs.get(tabs_fingerprints[index], [])):
+            touched_by_tab[index] = joins.make_tab_joins(tabs[index])
+    joins.log_stats()
+    FreeCAD.Console.PrintLog("Incremental joins : %d/%d tabs made, %d/%d parts to rebuild\n"
+                             % (len(touched_by_tab), len(tabs), len(dirty_parts), len(parts)))
+
+    state = {'version': JOINS_STATE_VERSION, 'engine': joins.engine, 'parts': parts_fingerprints, 'tabs': {}}
+    for index, fingerprint in enumerate(tabs_fingerprints):
+        if index in touched_by_tab:
+            state['tabs'][fingerprint] = sorted(touched_by_tab[index])
         else:
-            raise ValueError("Unknown tab type")
-    return parts_element
\ No newline at end of file
+            state['tabs'][fingerprint] = previous_tabs[fingerprint]
+    return joins.parts_element, dirty_parts, state
+
+
+# Keys of the generated shapes in the shape cache, by part name : the part fingerprint with the
+# fingerprints of the tabs touching it and of the parts these tabs touch
+def get_parts_result_keys(state):
+    tabs_by_part = {}
+    for tab_fingerprint, touched_parts in state['tabs'].items():
+        for name in touched_parts:
+            tabs_by_part.setdefault(name, []).append(tab_fingerprint)
+    keys = {}
+    for name, part_fingerprint in state['parts'].items():
+        values = ["joins", str(JOINS_STATE_VERSION), str(state.get('engine')), part_fingerprint]
+        for tab_fingerprint in sorted(tabs_by_part.get(name, [])):
+            values.append(tab_fingerprint)
+            values.extend([state['parts'].get(touched_name, "") for touched_name in state['tabs'][tab_fingerprint]])
+        keys[name] = shapecache.make_key(*values)
+    return keys
@@ -22,9 +22,7 @@
 # *                                                                         *
 # ***************************************************************************
 
-from FreeCAD import Gui
 import FreeCAD
-import FreeCADGui
 import Part
 from lasercut.boxproperties import BoxProperties, TopBottomProperties
 
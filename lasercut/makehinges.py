@@ -25,10 +25,60 @@
 import Part
 import FreeCAD
 import math
-from lasercut.helper import transform, compare_freecad_vector, compare_value, Segment, assemble_list_element
+import json
+from lasercut.helper import transform, compare_freecad_vector, compare_value, Segment
+from lasercut import helper, shapecache
+
+
+# Hinges geometry, skeletons of flat parts and slot cutters are kept between recomputes, so that
+# changing the slots of a hinge only rebuilds and cuts again the region of this hinge. Keys are
+# fingerprints of the faces, shapes and parameters they are made from.
+HINGES_CACHE_SIZE = 256
+hinges_cache = {}
+
+
+def clear_hinges_cache():
+    hinges_cache.clear()
+
+
+def get_hinges_cached(key, build):
+    if key not in hinges_cache:
+        if len(hinges_cache) >= HINGES_CACHE_SIZE:
+            hinges_cache.clear()
+        hinges_cache[key] = build()
+    return hinges_cache[key]
+
+
+# Hinge properties computed by complete_hinges_properties
+HINGE_GEOMETRY_PROPERTIES = ('seg_face_1', 'seg_face_2', 'extrustion_vector', 'rad_angle', 'deg_angle',
+                             'rotation_vector', 'arc_length', 'arc_inner_radius', 'arc_outer_radius', 'thickness')
+
+
+def get_hinge_geometry_key(reversed_angle, face_1, face_2):
+    return helper.make_fingerprint("geometry", str(bool(reversed_angle)), helper.face_fingerprint(face_1),
+                                   helper.face_fingerprint(face_2))
 
 
 def complete_hinges_properties(hinge, face_1, face_2, storeAll = False):
+    def build_geometry():
+        geometry = helper.ObjectProperties(reversed_angle=hinge.reversed_angle)
+        compute_hinge_geometry(geometry, face_1, face_2)
+        return dict((name, getattr(geometry, name)) for name in HINGE_GEOMETRY_PROPERTIES)
+
+    geometry_key = get_hinge_geometry_key(hinge.reversed_angle, face_1, face_2)
+    for name, value in get_hinges_cached(("geometry", geometry_key), build_geometry).items():
+        setattr(hinge, name, value)
+
+    if storeAll is False:
+        hinge.extrustion_vector = None
+        hinge.seg_face_1 = None
+        hinge.seg_face_2 = None
+        hinge.rotation_vector = None
+
+    return True
+
+
+def compute_hinge_geometry(hinge, face_1, face_2):
     edge1, edge2, extrusion_vector = get_coplanar_edge(face_1, face_2)
     seg_face_1, seg_face_2 = get_segment_from_edge(edge1, edge2)
     intersection_point = do_intersection(seg_face_1,seg_face_2)
@@ -46,24 +96,8 @@ def complete_hinges_properties(hinge, face_1, face_2, storeAll = False):
     outer_arc_radius = intersection_point.sub(seg_face_1.A).Length
     mid_arc_radius = intersection_point.sub(seg_face_1.mid_point()).Length
 
-    mid_point_b = seg_face_1.B.add(seg_face_2.B)
-    mid_point_b.scale(0.5, 0.5, 0.5)
-    dir_mid_point = mid_point_b.sub(intersection_point)
-    dir_mid_point.normalize()
-
-    inner_arc_point = dir_mid_point * inner_arc_radius
-    outter_arc_point = dir_mid_point * outer_arc_radius
-    if hinge.reversed_angle:
-        inner_arc_point = intersection_point.sub(inner_arc_point)
-        outter_arc_point = intersection_point.sub(outter_arc_point)
-    else:    
-        inner_arc_point = inner_arc_point.add(intersection_point)
-        outter_arc_point = outter_arc_point.add(intersection_point)
-    arc_middle_segment = Segment(outter_arc_point, inner_arc_point)
-    
     hinge.seg_face_1 = seg_face_1
     hinge.seg_face_2 = seg_face_2
-    hinge.arc_middle_segment = arc_middle_segment
     hinge.extrustion_vector = extrusion_vector
     hinge.rad_angle = seg_face_1.get_angle(seg_face_2)
     if hinge.reversed_angle:
@@ -76,20 +110,40 @@ def complete_hinges_properties(hinge, face_1, face_2, storeAll = False):
     hinge.arc_inner_radius = inner_arc_radius
     hinge.arc_outer_radius = outer_arc_radius
     hinge.thickness = seg_face_1.length()
+    return
 
-    if storeAll is False:
-        hinge.arc_middle_segment = None
-        hinge.extrustion_vector = None
-        hinge.seg_face_1 = None
-        hinge.seg_face_2 = None
-        hinge.rotation_vector = None
 
-    return True
+# Geometry of the solid preview only, the flat part does not need it
+def get_arc_middle_segment(hinge):
+    seg_face_1 = hinge.seg_face_1
+    seg_face_2 = hinge.seg_face_2
+    intersection_point = do_intersection(seg_face_1, seg_face_2)
+
+    mid_point_b = seg_face_1.B.add(seg_face_2.B)
+    mid_point_b.scale(0.5, 0.5, 0.5)
+    dir_mid_point = mid_point_b.sub(intersection_point)
+    dir_mid_point.normalize()
+
+    inner_arc_point = dir_mid_point * hinge.arc_inner_radius
+    outter_arc_point = dir_mid_point * hinge.arc_outer_radius
+    if hinge.reversed_angle:
+        inner_arc_point = intersection_point.sub(inner_arc_point)
+        outter_arc_point = intersection_point.sub(outter_arc_point)
+    else:    
+        inner_arc_point = inner_arc_point.add(intersection_point)
+        outter_arc_point = outter_arc_point.add(intersection_point)
+    return Segment(outter_arc_point, inner_arc_point)
 
 
 def create_solid_corner(hinge):
-    inner_arc_point = hinge.arc_middle_segment.B
-    outter_arc_point = hinge.arc_middle_segment.A
+    hinge.solid = make_solid_corner(hinge)
+    return
+
+
+def make_solid_corner(hinge):
+    arc_middle_segment = get_arc_middle_segment(hinge)
+    inner_arc_point = arc_middle_segment.B
+    outter_arc_point = arc_middle_segment.A
 
     l1 = Part.makeLine(hinge.seg_face_1.A, hinge.seg_face_1.B)
     a2 = Part.Arc(hinge.seg_face_1.B, inner_arc_point, hinge.seg_face_2.B).toShape()
@@ -98,9 +152,9 @@ def create_solid_corner(hinge):
     wire = Part.Wire([l1, a2, l3, a4])
     face = Part.Face(wire)
 
-    hinge.solid = face.extrude(hinge.extrustion_vector)
-    #Part.show(hinge.solid)
-    return
+    solid = face.extrude(hinge.extrustion_vector)
+    #Part.show(solid)
+    return solid
 
 
 def get_coplanar_edge(face1, face2):
@@ -216,6 +270,24 @@ def estimate_min_link(rad_angle, thickness, clearance_width):
     return math.ceil(min_link)
 
 
+# Hinge properties chosen by the user, the others are computed from the faces
+HINGE_KEY_PROPERTIES = ('freecad_object_1_name', 'freecad_face_1_name', 'freecad_object_2_name',
+                        'freecad_face_2_name', 'nb_link', 'reversed_angle')
+
+
+# Key of the shapes made by create_linked_part in the shape cache. Hinges only need their
+# freecad_object_1 and freecad_object_2, so the key is known before the hinges are completed.
+def get_hinges_result_key(hinges_list, material_properties):
+    values = ["hinges", helper.properties_fingerprint(material_properties)]
+    for hinge in hinges_list:
+        values.append(json.dumps([getattr(hinge, name, None) for name in HINGE_KEY_PROPERTIES]))
+        values.append(helper.shape_fingerprint(hinge.freecad_object_1.Shape))
+        values.append(helper.shape_fingerprint(hinge.freecad_object_2.Shape))
+    return shapecache.make_key(*values)
+
+
+# Returns the flat part, the solid (None if generate_solid is not set) and the 2D pattern of the flat
+# part (None if generate_pattern is not set)
 def create_linked_part(hinges_list, material_properties):
     if len(hinges_list) == 0:
         raise ValueError("No hinge defined")
@@ -231,39 +303,62 @@ def create_linked_part(hinges_list, material_properties):
               "hinges apertures are in fact square with 10e-3 width, so you have to remove manually the three  " + \
               "others sides for all square to avoid laser returning to same place.")
 
-    parts_to_fuse = [hinges_list[0].freecad_object_1.Shape.copy()]
+    generate_pattern = getattr(material_properties, 'generate_pattern', False)
+    skeleton_key = get_skeleton_key(hinges_list)
+    flat_skeleton, hinges_faces = get_hinges_cached(("skeleton", skeleton_key),
+                                                    lambda: make_flat_skeleton(hinges_list))
+    margin = round(material_properties.link_clearance, helper.PRIMITIVE_PRECISION)
+    split_skeleton = get_hinges_cached(("regions", skeleton_key, margin),
+                                       lambda: split_flat_skeleton(flat_skeleton, hinges_list, hinges_faces, margin))
+
     hinges_to_removes = []
-    last_face = hinges_list[0].freecad_face_1
-    sum_angle = 0.
-    rotation_vector = None
+    hinges_patterns = []
+    cut_regions = []
     for index, hinge in enumerate(hinges_list):
         if hinge.nb_link < hinge.min_links_nb:
             FreeCAD.Console.PrintError("Min. link is not respected for living hinges named " + str(hinge.name))
 
-        flat_connection = create_flat_connection(hinge, last_face)
-        parts_to_fuse.append(flat_connection)
-        hinges_to_removes.append(make_hinges(hinge, material_properties, last_face))
-        last_face = find_same_normal_face(flat_connection, last_face)
+        face = hinges_faces[index]
+        cutter_key = get_hinge_cutter_key(hinge, material_properties, face)
+        hinge_to_remove = get_hinges_cached(("cutter", cutter_key),
+                                            lambda: make_hinges(hinge, material_properties, face))
+        hinges_to_removes.append(hinge_to_remove)
+        if split_skeleton is not None:
+            region = split_skeleton[1][index]
+            cut_regions.append(get_hinges_cached(("region", skeleton_key, margin, index, cutter_key),
+                                                 lambda: region.cut(hinge_to_remove)))
+        if generate_pattern:
+            hinges_patterns.append(make_hinges_pattern(hinge, material_properties, face))
+
+    if split_skeleton is not None:
+        # The faces split along the seams of the regions are merged once
+        flat_part = split_skeleton[0].multiFuse(cut_regions).removeSplitter()
+    else:
+        flat_part = flat_skeleton.cut(hinges_to_removes)
 
-        sum_angle += hinge.deg_angle
-        if rotation_vector is None:
-            rotation_vector = hinge.rotation_vector
+    solid = None
+    if getattr(material_properties, 'generate_solid', True):
+        solid = create_linked_solid(hinges_list)
 
-        second_shape_transformed = assemble_shape(last_face, hinge.freecad_object_2.Shape, hinge.freecad_face_2,
-                                                  rotation_vector, -sum_angle)
-        parts_to_fuse.append(second_shape_transformed)
-        if index < (len(hinges_list) - 1):
-            last_face = find_same_normal_face(second_shape_transformed, last_face)
+    pattern = None
+    if generate_pattern:
+        pattern = make_flat_pattern(flat_skeleton, hinges_patterns)
 
-    flat_part = assemble_list_element(parts_to_fuse)
-    for hinge_to_remove in hinges_to_removes:
-        flat_part = flat_part.cut(hinge_to_remove)
+    return flat_part, solid, pattern
 
-    solid = hinges_list[0].solid.copy()
-    for hinge in hinges_list[1:]:
-        solid = solid.fuse(hinge.solid)
 
-    return flat_part, solid
+# Solid preview of the bent corners, the corner of each hinge is made on demand
+def create_linked_solid(hinges_list):
+    solids = []
+    for hinge in hinges_list:
+        if hinge.solid is None:
+            geometry_key = get_hinge_geometry_key(hinge.reversed_angle, hinge.freecad_face_1, hinge.freecad_face_2)
+            hinge.solid = get_hinges_cached(("solid", geometry_key), lambda: make_solid_corner(hinge))
+        solids.append(hinge.solid)
+    solid = solids[0].copy()
+    if len(solids) > 1:
+        solid = solid.multiFuse(solids[1:])
+    return solid
 
 
 def create_flat_connection(hinge_properties, referentiel_face):
@@ -305,26 +400,43 @@ def get_hinges_y_positions(nb_holes_by_column, hole_length, hole_space):
     return y_pos_list
 
 
-def create_hole_hinge(hinge_clearance, hinge_length, thickness, kerf_diameter):
-    height = thickness * 2.0
+# Returns the width and the length of the straight part of a slot, and if its ends are rounded
+def get_hole_hinge_dimensions(hinge_clearance, hinge_length, kerf_diameter):
     hinge_width = max(10e-3, hinge_clearance - kerf_diameter)
     if hinge_clearance < kerf_diameter:
         raise ValueError("Hinge clearance is less than kerf diameter")
     elif hinge_clearance < 2. * kerf_diameter:
-        box_length = hinge_length - kerf_diameter
+        return hinge_width, hinge_length - kerf_diameter, False
+    # hinge_width is for the two corner radius
+    return hinge_width, hinge_length - hinge_width - kerf_diameter, True
+
+
+def create_hole_hinge(hinge_clearance, hinge_length, thickness, kerf_diameter):
+    height = thickness * 2.0
+    hinge_width, box_length, rounded = get_hole_hinge_dimensions(hinge_clearance, hinge_length, kerf_diameter)
+    if not rounded:
         hinge = Part.makeBox(hinge_width, box_length, height, FreeCAD.Vector(-hinge_width/2.0, -box_length/2.0, -height/2.0))
     else:
-        box_length = hinge_length - hinge_width - kerf_diameter # hinge_width is for the two corner radius
         hinge = draw_rounded_hinge(hinge_width, box_length, height)
 
     return hinge
 
 
-def draw_rounded_hinge(hinge_width, hinge_length, height):
+# Outline of the slot made by create_hole_hinge, in the plane z = 0
+def create_hole_hinge_wire(hinge_clearance, hinge_length, kerf_diameter):
+    hinge_width, box_length, rounded = get_hole_hinge_dimensions(hinge_clearance, hinge_length, kerf_diameter)
+    if not rounded:
+        half_w = hinge_width / 2.0
+        half_l = box_length / 2.0
+        return Part.makePolygon([FreeCAD.Vector(-half_w, -half_l, 0), FreeCAD.Vector(-half_w, half_l, 0),
+                                 FreeCAD.Vector(half_w, half_l, 0), FreeCAD.Vector(half_w, -half_l, 0),
+                                 FreeCAD.Vector(-half_w, -half_l, 0)])
+    return draw_rounded_hinge_wire(hinge_width, box_length, 0.)
+
+
+def draw_rounded_hinge_wire(hinge_width, hinge_length, z_plane):
     half_w = hinge_width/2.0
     half_l = hinge_length/2.0
-    half_h = height / 2.0
-    z_plane = -half_h
     v1 = FreeCAD.Vector(-half_w, -half_l, z_plane)
     v2 = FreeCAD.Vector(-half_w, half_l, z_plane)
     v3 = FreeCAD.Vector(half_w, half_l, z_plane)
@@ -335,17 +447,21 @@ def draw_rounded_hinge(hinge_width, hinge_length, height):
     c2 = Part.Arc(v2, vc2, v3).toShape()
     l1 = Part.makeLine(v1, v2)
     l2 = Part.makeLine(v3, v4)
-    wire = Part.Wire([c1, l1, c2, l2])
+    return Part.Wire([c1, l1, c2, l2])
+
+
+def draw_rounded_hinge(hinge_width, hinge_length, height):
+    wire = draw_rounded_hinge_wire(hinge_width, hinge_length, -height / 2.0)
     hinge = wire.extrude(FreeCAD.Vector(0.0, 0.0, height))
     hinge_solid = Part.makeSolid(hinge)
     return hinge_solid
 
 
-def make_hinges(hinge_properties, global_hinges_properties, referentiel_face):
+# Returns the length of the slots and the positions of the columns and of the slots of the two
+# column types
+def get_hinges_layout(hinge_properties, global_hinges_properties):
     x_hinges_positions = get_hinges_x_positions(hinge_properties.nb_link, hinge_properties.arc_length)
-    hinges_list = []
     y_length = hinge_properties.extrustion_vector.Length
-    thickness = hinge_properties.thickness
     length_ratio = global_hinges_properties.occupancy_ratio
 
     nb_holes_by_column = int(global_hinges_properties.alternate_nb_hinge)
@@ -354,27 +470,139 @@ def make_hinges(hinge_properties, global_hinges_properties, referentiel_face):
     y_pos_list = get_hinges_y_positions(nb_holes_by_column, hole_length, hole_space)
     nb_holes_by_column = int(nb_holes_by_column + 1)
     y_pos_list_2 = get_hinges_y_positions(nb_holes_by_column, hole_length, hole_space)
+    return hole_length, x_hinges_positions, [y_pos_list, y_pos_list_2]
 
-    index = 0
-    for hinge_x in x_hinges_positions:
 
-        if index % 2 == 0:
-            pos_list = y_pos_list
-        else:
-            pos_list = y_pos_list_2
+def make_hinges(hinge_properties, global_hinges_properties, referentiel_face):
+    hole_length, x_hinges_positions, y_pos_lists = get_hinges_layout(hinge_properties, global_hinges_properties)
+    # All slots are the same, each column type is built once from one slot and then copied
+    hole = create_hole_hinge(global_hinges_properties.link_clearance, hole_length, hinge_properties.thickness,
+                             global_hinges_properties.laser_beam_diameter)
+    return place_hinges(hole, x_hinges_positions, y_pos_lists, referentiel_face)
+
 
-        for pos_y in pos_list:
-            new_hinge = create_hole_hinge(global_hinges_properties.link_clearance, hole_length, thickness,
-                                          global_hinges_properties.laser_beam_diameter)
-            new_hinge.translate(FreeCAD.Vector(hinge_x, pos_y, 0))
-            hinges_list.append(new_hinge)
-        index += 1
+# Same layout as make_hinges, but with the outlines of the slots in the middle plane of the part
+def make_hinges_pattern(hinge_properties, global_hinges_properties, referentiel_face):
+    hole_length, x_hinges_positions, y_pos_lists = get_hinges_layout(hinge_properties, global_hinges_properties)
+    hole = create_hole_hinge_wire(global_hinges_properties.link_clearance, hole_length,
+                                  global_hinges_properties.laser_beam_diameter)
+    return place_hinges(hole, x_hinges_positions, y_pos_lists, referentiel_face)
 
-    hinges_to_remove = assemble_list_element(hinges_list)
+
+def place_hinges(hole, x_hinges_positions, y_pos_lists, referentiel_face):
+    hinges_list = []
+    columns = [make_hinges_column(hole, y_pos_list) for y_pos_list in y_pos_lists]
+
+    for index, hinge_x in enumerate(x_hinges_positions):
+        column = columns[index % 2].copy()
+        column.translate(FreeCAD.Vector(hinge_x, 0, 0))
+        hinges_list.append(column)
+
+    # Slots are disjoint, so a compound can be used for the cut instead of fusing them
+    hinges_to_remove = Part.makeCompound(hinges_list)
     hinges_to_remove_transformed = transform(hinges_to_remove, referentiel_face)
     return hinges_to_remove_transformed
 
 
+def make_hinges_column(hole, y_pos_list):
+    holes = []
+    for pos_y in y_pos_list:
+        new_hole = hole.copy()
+        new_hole.translate(FreeCAD.Vector(0, pos_y, 0))
+        holes.append(new_hole)
+    return Part.makeCompound(holes)
+
+
+def get_skeleton_key(hinges_list):
+    values = ["skeleton", helper.shape_fingerprint(hinges_list[0].freecad_object_1.Shape),
+              helper.face_fingerprint(hinges_list[0].freecad_face_1)]
+    for hinge in hinges_list:
+        values.append(get_hinge_geometry_key(hinge.reversed_angle, hinge.freecad_face_1, hinge.freecad_face_2))
+        values.append(helper.shape_fingerprint(hinge.freecad_object_2.Shape))
+    return helper.make_fingerprint(*values)
+
+
+# Material properties used by the slots
+HINGE_SLOT_PROPERTIES = ('link_clearance', 'laser_beam_diameter', 'occupancy_ratio', 'alternate_nb_hinge')
+
+
+def get_hinge_cutter_key(hinge, material_properties, referentiel_face):
+    values = [hinge.nb_link] + [getattr(material_properties, name) for name in HINGE_SLOT_PROPERTIES]
+    return helper.make_fingerprint("cutter", get_hinge_geometry_key(hinge.reversed_angle, hinge.freecad_face_1,
+                                                                    hinge.freecad_face_2),
+                                   helper.face_fingerprint(referentiel_face), json.dumps(values))
+
+
+# Flat part without slots, made of the parts and of the flat connections of the hinges. Returns it
+# with the face on which the slots of each hinge are placed.
+def make_flat_skeleton(hinges_list):
+    parts_to_fuse = [hinges_list[0].freecad_object_1.Shape.copy()]
+    hinges_faces = []
+    last_face = hinges_list[0].freecad_face_1
+    sum_angle = 0.
+    rotation_vector = None
+    for index, hinge in enumerate(hinges_list):
+        flat_connection = create_flat_connection(hinge, last_face)
+        parts_to_fuse.append(flat_connection)
+        hinges_faces.append(last_face)
+        last_face = find_same_normal_face(flat_connection, last_face)
+
+        sum_angle += hinge.deg_angle
+        if rotation_vector is None:
+            rotation_vector = hinge.rotation_vector
+
+        second_shape_transformed = assemble_shape(last_face, hinge.freecad_object_2.Shape, hinge.freecad_face_2,
+                                                  rotation_vector, -sum_angle)
+        parts_to_fuse.append(second_shape_transformed)
+        if index < (len(hinges_list) - 1):
+            last_face = find_same_normal_face(second_shape_transformed, last_face)
+
+    # Parts and connections are fused with one boolean, instead of fusing them two by two. The faces
+    # split along their seams are merged once here, for the pattern section and the cut.
+    return parts_to_fuse[0].multiFuse(parts_to_fuse[1:]).removeSplitter(), hinges_faces
+
+
+# Box around the flat connection of a hinge. Along the arc (X), slots stick out of the connection by
+# less than half the link clearance, which is used as margin. Along the hinge (Y), the outer slots
+# of the alternate columns go past the connection, by less than the connection length on each side.
+def make_hinge_region(hinge, referentiel_face, margin):
+    x_size = hinge.arc_length + 2. * margin
+    y_size = 3. * hinge.extrustion_vector.Length + 2. * margin
+    z_size = hinge.thickness * 2. + 2. * margin
+    box = Part.makeBox(x_size, y_size, z_size, FreeCAD.Vector(-margin, -y_size / 2.0, -z_size / 2.0))
+    return transform(box, referentiel_face)
+
+
+# Splits the skeleton in the regions of the hinges and the rest. Returns None if regions overlap,
+# the whole skeleton is then cut at once. Hinges are laid out one after the other along the flat
+# part, separated by a part, so only consecutive regions can overlap.
+def split_flat_skeleton(flat_skeleton, hinges_list, hinges_faces, margin):
+    regions = [make_hinge_region(hinge, face, margin) for hinge, face in zip(hinges_list, hinges_faces)]
+    for region, other in zip(regions[:-1], regions[1:]):
+        if region.BoundBox.intersect(other.BoundBox) and region.common(other).Volume > 0.001:
+            return None
+    rest = flat_skeleton.cut(regions)
+    if len(rest.Solids) == 0:
+        return None
+    return rest, [flat_skeleton.common(region) for region in regions]
+
+
+# Property of the flat part object holding its 2D pattern
+PATTERN_PROPERTY = "HingesPattern"
+
+
+# 2D pattern of the flat part in its middle plane : the section of the part without slots, cut by
+# the faces of the slots with a 2D boolean since the outer slots go past the part edges. Returns the
+# wires of the result, which can be exported without 3D boolean nor projection.
+def make_flat_pattern(flat_skeleton, hinges_patterns):
+    slots = Part.makeCompound(hinges_patterns)
+    normal = FreeCAD.Vector(helper.biggest_area_faces(flat_skeleton)[0]).normalize()
+    position = slots.Vertexes[0].Point.dot(normal)
+    outline = Part.makeFace(flat_skeleton.slice(normal, position), "Part::FaceMakerBullseye")
+    pattern = outline.cut([Part.Face(wire) for wire in slots.Wires])
+    return Part.makeCompound(pattern.Wires)
+
+
 def assemble_shape(face1, shape, face2, rotation_vector, rotation_angle):
     new_shape = shape.copy()
     new_shape.rotate(face2.CenterOfMass, rotation_vector, rotation_angle)
@@ -22,14 +22,12 @@
 # *                                                                         *
 # ***************************************************************************
 
-from FreeCAD import Gui
 import FreeCAD
-import FreeCADGui
 import Part
 import math
+import numpy
 from lasercut.roundedboxproperties import RoundedBoxProperties, TopBottomRoundedProperties
 import lasercut.helper as helper
-from lasercut.makehinges import do_intersection
 
 
 def make_rounded_box(dimension_properties, top_properties, bottom_properties):
@@ -65,26 +63,35 @@ def make_rounded_box(dimension_properties, top_properties, bottom_properties):
     return part_list
 
 
-def create_contours(radius, nb_face, side_length, thickness):
-    rel_angle = 2.0 * math.pi / float(nb_face)
-    polygon_segment = []
+# Points of all the sides computed at once : for each side, the outer and inner points of its first
+# segment then of its second segment. Side i is side 0 rotated by i * 2 * pi / nb_face around Z.
+def get_contours_points(radius, nb_face, side_length, thickness):
+    angles = numpy.arange(int(nb_face)) * (2.0 * math.pi / float(nb_face))
+    local_points = numpy.array([[thickness, -side_length / 2.0], [0., -side_length / 2.0],
+                                [thickness, side_length / 2.0], [0., side_length / 2.0]])
+    cos = numpy.cos(angles)[:, numpy.newaxis]
+    sin = numpy.sin(angles)[:, numpy.newaxis]
+    x = local_points[:, 0] * cos - local_points[:, 1] * sin + radius * cos
+    y = local_points[:, 0] * sin + local_points[:, 1] * cos + radius * sin
+    return numpy.stack([x, y], axis=-1)
 
-    for face_index in range(int(nb_face)):
-        seg_a = helper.Segment(FreeCAD.Vector(thickness, -side_length / 2.0, 0.),
-                               FreeCAD.Vector(0., -side_length / 2.0, 0.))
-        seg_b = helper.Segment(FreeCAD.Vector(thickness, side_length / 2.0, 0.),
-                               FreeCAD.Vector(0., side_length / 2.0, 0.))
-        current_angle = rel_angle * face_index
-        translation = helper.rotate_vector_z(FreeCAD.Vector(radius, 0., 0), current_angle)
-        transformed_seg_a = seg_a.rotate_z(current_angle).add(translation)
-        transformed_seg_b = seg_b.rotate_z(current_angle).add(translation)
 
-        polygon_segment.append([transformed_seg_a, transformed_seg_b])
+def to_vector(point):
+    return FreeCAD.Vector(float(point[0]), float(point[1]), 0.)
 
 
+def make_segments(contours_points):
+    polygon_segment = []
+    for points in contours_points:
+        polygon_segment.append([helper.Segment(to_vector(points[0]), to_vector(points[1])),
+                                helper.Segment(to_vector(points[2]), to_vector(points[3]))])
     return polygon_segment
 
 
+def create_contours(radius, nb_face, side_length, thickness):
+    return make_segments(get_contours_points(radius, nb_face, side_length, thickness))
+
+
 # Split a list into roughly equal-sized pieces :
 # http://stackoverflow.com/questions/2130016/splitting-a-list-of-arbitrary-size-into-only-roughly-n-equal-parts
 def chunkIt(seq, num):
@@ -101,40 +108,50 @@ def chunkIt(seq, num):
     return out
 
 
+def extrude_side(p1, p2, p3, p4, height):
+    part = create_shape(p1, p2, p3, p4).extrude(FreeCAD.Vector(0, 0, height))
+    part.translate(FreeCAD.Vector(0, 0., -height/2))
+    return part
+
+
+def rotate_copy_z(shape, angle):
+    new_shape = shape.copy()
+    new_shape.rotate(FreeCAD.Vector(0, 0, 0), FreeCAD.Vector(0, 0, 1), angle)
+    return new_shape
+
+
+# Sides of the contours made by create_contours are the same up to a rotation, so the first side is
+# extruded once (whole and cut in two) and the others are rotated copies.
 def create_sides(polygon_segment, height, nb_cut):
     part_list = []
-    index = 0
     nb_face = len(polygon_segment)
+    rel_angle = 360.0 / float(nb_face)
 
     cut_index_list = []
     for chunk_list in chunkIt(range(nb_face), nb_cut):
         cut_index_list.append(chunk_list[0])
 
-    for index in range(nb_face):
-        seg_a, seg_b = polygon_segment[index]
+    seg_a, seg_b = polygon_segment[0]
+    side = None
+    if len(cut_index_list) < nb_face:
+        side = extrude_side(seg_a.A, seg_b.A, seg_b.B, seg_a.B, height)
+    side_1 = None
+    side_2 = None
+    if len(cut_index_list) > 0:
+        mid_point_a = seg_a.A.add(seg_b.A)
+        mid_point_a.scale(0.5, 0.5, 0.5)
+        mid_point_b = seg_a.B.add(seg_b.B)
+        mid_point_b.scale(0.5, 0.5, 0.5)
+        side_1 = extrude_side(seg_a.A, mid_point_a, mid_point_b, seg_a.B, height)
+        side_2 = extrude_side(mid_point_a, seg_b.A, seg_b.B, mid_point_b, height)
 
+    for index in range(nb_face):
+        angle = rel_angle * index
         if index not in cut_index_list:
-            face = create_shape(seg_a.A, seg_b.A, seg_b.B, seg_a.B)
-            part = face.extrude(FreeCAD.Vector(0, 0, height))
-            part.translate(FreeCAD.Vector(0, 0., -height/2))
-            part_list.append({'shape': part, 'name': "side_face_%d" % index})
+            part_list.append({'shape': rotate_copy_z(side, angle), 'name': "side_face_%d" % index})
         else:
-            mid_point_a = seg_a.A.add(seg_b.A)
-            mid_point_a.scale(0.5, 0.5, 0.5)
-            mid_point_b = seg_a.B.add(seg_b.B)
-            mid_point_b.scale(0.5, 0.5, 0.5)
-
-            face_1 = create_shape(seg_a.A, mid_point_a, mid_point_b, seg_a.B)
-            part_1 = face_1.extrude(FreeCAD.Vector(0, 0, height))
-            part_1.translate(FreeCAD.Vector(0, 0., -height/2))
-
-            face_2 = create_shape(mid_point_a, seg_b.A, seg_b.B, mid_point_b)
-            part_2 = face_2.extrude(FreeCAD.Vector(0, 0, height))
-            part_2.translate(FreeCAD.Vector(0, 0., -height/2))
-
-            part_list.append({'shape': part_1, 'name': "side_face_%d_a" % index})
-            part_list.append({'shape': part_2, 'name': "side_face_%d_b" % index})
-        index += 1
+            part_list.append({'shape': rotate_copy_z(side_1, angle), 'name': "side_face_%d_a" % index})
+            part_list.append({'shape': rotate_copy_z(side_2, angle), 'name': "side_face_%d_b" % index})
 
     return part_list
 
@@ -150,30 +167,47 @@ def create_shape(p1, p2, p3, p4):
     return face
 
 
-def retrieve_segments_arc(polygon_segment):
+# For each side, outer and inner points of the arcs joining its second segment to the first segment
+# of the next side, computed at once for all sides from the points of get_contours_points.
+def get_arcs_points(contours_points):
+    first_outer = contours_points[:, 2]
+    first_inner = contours_points[:, 3]
+    second_outer = numpy.roll(contours_points[:, 0], -1, axis=0)
+    second_inner = numpy.roll(contours_points[:, 1], -1, axis=0)
+
+    # intersection of the lines of the segments, as do_intersection
+    first_direction = first_inner - first_outer
+    second_direction = second_inner - second_outer
+    offset = second_outer - first_outer
+    denominator = first_direction[:, 0] * second_direction[:, 1] - first_direction[:, 1] * second_direction[:, 0]
+    if numpy.any(numpy.abs(denominator) < 10e-12):
+        raise ValueError("Parallel sides")
+    scale = (offset[:, 0] * second_direction[:, 1] - offset[:, 1] * second_direction[:, 0]) / denominator
+    if numpy.any(scale < 10e-6):
+        raise ValueError("Wrong scale")
+    intersection_points = first_outer + scale[:, numpy.newaxis] * first_direction
+
+    inner_arc_radius = numpy.linalg.norm(intersection_points - first_inner, axis=1)[:, numpy.newaxis]
+    outer_arc_radius = numpy.linalg.norm(intersection_points - first_outer, axis=1)[:, numpy.newaxis]
+    dir_mid_point = (first_inner + second_inner) / 2.0 - intersection_points
+    dir_mid_point /= numpy.linalg.norm(dir_mid_point, axis=1)[:, numpy.newaxis]
+
+    outer_arc_points = intersection_points + dir_mid_point * outer_arc_radius
+    inner_arc_points = intersection_points + dir_mid_point * inner_arc_radius
+    return numpy.stack([outer_arc_points, inner_arc_points], axis=1)
+
+
+def make_arcs_segments(arcs_points):
     arcs_segment_list = []
+    for outer_arc_point, inner_arc_point in arcs_points:
+        arcs_segment_list.append(helper.Segment(to_vector(outer_arc_point), to_vector(inner_arc_point)))
+    return arcs_segment_list
 
-    nb_face = len(polygon_segment)
-    for index in range(nb_face):
-        first_segment = polygon_segment[index][1]
-        second_segment = polygon_segment[(index + 1) % nb_face][0]
-
-        intersection_point = do_intersection(first_segment, second_segment)
-        inner_arc_radius = intersection_point.sub(first_segment.B).Length
-        outer_arc_radius = intersection_point.sub(first_segment.A).Length
-        mid_point_b = first_segment.B.add(second_segment.B)
-        mid_point_b.scale(0.5, 0.5, 0.5)
-        dir_mid_point = mid_point_b.sub(intersection_point)
-        dir_mid_point.normalize()
-
-        inner_arc_point = dir_mid_point * inner_arc_radius
-        inner_arc_point = inner_arc_point.add(intersection_point)
-        outer_arc_point = dir_mid_point * outer_arc_radius
-        outer_arc_point = outer_arc_point.add(intersection_point)
-        arcs_segment_list.append(helper.Segment(outer_arc_point, inner_arc_point))
 
-    #FreeCAD.Console.PrintMessage("Computed arc radius : inner = %f, outer = %f" % (inner_arc_radius, outer_arc_radius))
-    return arcs_segment_list
+def retrieve_segments_arc(polygon_segment):
+    contours_points = numpy.array([[[segment.A.x, segment.A.y], [segment.B.x, segment.B.y]]
+                                   for segments in polygon_segment for segment in segments])
+    return make_arcs_segments(get_arcs_points(contours_points.reshape(len(polygon_segment), 4, 2)))
 
 
 def get_contours_with_arc(edge, arcs_segment_list):
@@ -203,8 +237,10 @@ def create_plane_part(dimension_properties, plane_properties):
         radius = dimension_properties.inradius + plane_properties.radius_outside
         side_length = dimension_properties.side_length * radius / dimension_properties.inradius
 
-    edge = create_contours(radius, dimension_properties.nb_face, side_length, dimension_properties.thickness)
-    arcs_segment_list = retrieve_segments_arc(edge)
+    contours_points = get_contours_points(radius, dimension_properties.nb_face, side_length,
+                                          dimension_properties.thickness)
+    edge = make_segments(contours_points)
+    arcs_segment_list = make_arcs_segments(get_arcs_points(contours_points))
     inner_contours, outer_contours = get_contours_with_arc(edge, arcs_segment_list)
 
     if plane_properties.position == TopBottomRoundedProperties.POSITION_INSIDE:
@@ -25,7 +25,8 @@
 import FreeCAD
 import Part
 import collections
-from lasercut.helper import ObjectProperties, sort_quad_vertex, biggest_area_faces, sort_area_shape_list, compare_value
+from lasercut.helper import ObjectProperties, sort_quad_vertex, biggest_area_faces, sort_area_shape_list, compare_value, \
+    shape_fingerprint, get_extent
 
 
 class MaterialProperties(ObjectProperties):
@@ -51,7 +52,7 @@ class MaterialProperties(ObjectProperties):
             self.thickness = 5.0
             try:
                 #self.thickness = retrieve_thickness_from_biggest_face(self.freecad_object)
-                self.thickness = retrieve_thickness_from_biggest_face(kwargs['freecad_object'])
+                self.thickness = retrieve_thickness(kwargs['freecad_object'])
                 # FreeCAD.Console.PrintError("found : %f\n" % self.thickness)
             except ValueError as e:
                 FreeCAD.Console.PrintError(e)
@@ -75,16 +76,59 @@ class MaterialProperties(ObjectProperties):
 
     def recomputeInit(self, freecad_obj):
         self.freecad_object = freecad_obj
-        thickness = retrieve_thickness_from_biggest_face(freecad_obj)
+        thickness = retrieve_thickness(freecad_obj)
         if compare_value(thickness, self.thickness) is False:
             FreeCAD.Console.PrintError("Recomputed thickness for %s is different (%f != %f)\n" % (self.name, thickness, self.thickness))
 
 
+THICKNESS_CACHE_SIZE = 1024
+THICKNESS_VOLUME_TOLERANCE = 10e-4
+thickness_cache = {}
+
+
+def clear_thickness_cache():
+    thickness_cache.clear()
+
+
+# Thickness is detected once by shape, until the geometry of the shape changes
+def retrieve_thickness(freecad_object):
+    key = shape_fingerprint(freecad_object.Shape)
+    thickness = thickness_cache.get(key)
+    if thickness is None:
+        thickness = retrieve_thickness_from_bounded_box(freecad_object)
+        if thickness is None:
+            thickness = retrieve_thickness_from_biggest_face(freecad_object)
+        if len(thickness_cache) >= THICKNESS_CACHE_SIZE:
+            thickness_cache.clear()
+        thickness_cache[key] = thickness
+    return thickness
+
+
 # Prendre la normal la plus présente en terme de surface (biggest_area_faces)
-# appliquer  une transformation pour orienter la normal vers Z
-# l'éppaiseur et le Zlength du boundedbox (ce sera donc l'éppaisseur max)
-def retrieve_thickness_from_bounded_box():
-    return None
+# l'éppaiseur est l'étendue des sommets suivant cette normale (ce sera donc l'éppaisseur max)
+# Returns None if the shape is not a flat sheet: faces of the normal must lie on two planes bounding
+# the shape and the volume must be the area of one side by the thickness.
+def retrieve_thickness_from_bounded_box(freecad_object):
+    shape = freecad_object.Shape
+    normal, area, faces = biggest_area_faces(shape)
+    normal = FreeCAD.Vector(normal).normalize()
+    positions = []
+    for face in faces:
+        if not isinstance(face.Surface, Part.Plane) or len(face.Vertexes) == 0:
+            return None
+        positions.append(face.Vertexes[0].Point.dot(normal))
+    low, high = get_extent(shape, normal)
+    thickness = high - low
+    if compare_value(thickness, 0.) or not compare_value(min(positions), low) \
+            or not compare_value(max(positions), high):
+        return None
+    for position in positions:
+        if not compare_value(position, low) and not compare_value(position, high):
+            return None
+    volume = shape.Volume
+    if abs(volume - area / 2.0 * thickness) > THICKNESS_VOLUME_TOLERANCE * volume:
+        return None
+    return thickness
 
 
 # Prend les deux premiere faces ayant la même normal (géré exception !! si une seule face)
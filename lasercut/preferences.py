@@ -0,0 +1,107 @@
+#!/usr/bin/env python
+
+# ***************************************************************************
+# *                                                                         *
+# *   Copyright (c) 2016 execuc                                             *
+# *                                                                         *
+# *   This file is part of LCInterlocking module.                           *
+# *   LCInterlocking module is free software; you can redistribute it and/or*
+# *   modify it under the terms of the GNU Lesser General Public            *
+# *   License as published by the Free Software Foundation; either          *
+# *   version 2.1 of the License, or (at your option) any later version.    *
+# *                                                                         *
+# *   This module is distributed in the hope that it will be useful,       *
+# *   but WITHOUT ANY WARRANTY; without even the implied warranty of        *
+# *   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU     *
+# *   Lesser General Public License for more details.                       *
+# *                                                                         *
+# *   You should have received a copy of the GNU Lesser General Public      *
+# *   License along with this library; if not, write to the Free Software   *
+# *   Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston,            *
+# *   MA  02110-1301  USA                                                   *
+# *                                                                         *
+# ***************************************************************************
+
+
+import os
+import FreeCAD
+
+# Options of the workbench, stored in the FreeCAD user parameters. They can be changed from
+# Tools -> Edit parameters -> BaseApp/Preferences/Mod/LCInterlocking or from the python console :
+#   FreeCAD.ParamGet("User parameter:BaseApp/Preferences/Mod/LCInterlocking").SetBool("ParallelAssembly", True)
+PARAMETERS_PATH = "User parameter:BaseApp/Preferences/Mod/LCInterlocking"
+
+
+def get_parameters():
+    return FreeCAD.ParamGet(PARAMETERS_PATH)
+
+
+# Assemble generated parts in FreeCADCmd worker processes
+def parallel_assembly():
+    return get_parameters().GetBool("ParallelAssembly", False)
+
+
+# Analyze the crossings of the crosspiece parts in FreeCADCmd worker processes
+def parallel_cross_parts():
+    return get_parameters().GetBool("ParallelCrossParts", False)
+
+
+# Number of worker processes, 0 means one by processor
+def parallel_workers():
+    nb_workers = get_parameters().GetInt("ParallelWorkers", 0)
+    if nb_workers <= 0:
+        nb_workers = os.cpu_count() or 1
+    return nb_workers
+
+
+# Maximum time in seconds of a job in a worker process, 0 for no limit. A worker is killed after
+# this time multiplied by its number of jobs, its unfinished jobs are run again in FreeCAD.
+def worker_timeout():
+    return get_parameters().GetInt("WorkerTimeout", 300)
+
+
+# Path of the FreeCADCmd executable, empty to look for it next to FreeCAD
+def freecadcmd_path():
+    return get_parameters().GetString("FreeCADCmdPath", "")
+
+
+# Keep the generated shapes in a cache directory shared by all documents
+def result_cache():
+    return get_parameters().GetBool("ResultCache", False)
+
+
+# Cache directory, empty for LCInterlocking/cache in the FreeCAD user data directory
+def result_cache_path():
+    path = get_parameters().GetString("ResultCachePath", "")
+    if not path:
+        path = os.path.join(FreeCAD.getUserAppDataDir(), "LCInterlocking", "cache")
+    return path
+
+
+# Maximum size of the cache directory in megabytes, least recently used shapes are removed first
+def result_cache_size():
+    return get_parameters().GetInt("ResultCacheSize", 512)
+
+
+# Record the time spent in each stage of the joins and print it at the end of a recompute
+def instrumentation():
+    return get_parameters().GetBool("Instrumentation", False)
+
+
+# JSON file written with the instrumentation report, empty to print it in the report view
+def instrumentation_report_path():
+    return get_parameters().GetString("InstrumentationReportPath", "")
+
+
+JOIN_ENGINE_SOLID = "Solid"
+JOIN_ENGINE_PROFILE = "Profile"
+
+
+# Solid : parts are made with 3D booleans. Profile : sheet parts are made with 2D booleans on their
+# section then extruded, the parts which are not sheets are still made with 3D booleans.
+def join_engine():
+    engine = get_parameters().GetString("JoinEngine", JOIN_ENGINE_SOLID)
+    if engine not in (JOIN_ENGINE_SOLID, JOIN_ENGINE_PROFILE):
+        FreeCAD.Console.PrintWarning("Unknown join engine %s, %s is used\n" % (engine, JOIN_ENGINE_SOLID))
+        engine = JOIN_ENGINE_SOLID
+    return engine
@@ -0,0 +1,137 @@
+#!/usr/bin/env python
+
+# ***************************************************************************
+# *                                                                         *
+# *   Copyright (c) 2016 execuc                                             *
+# *                                                                         *
+# *   This file is part of LCInterlocking module.                           *
+# *   LCInterlocking module is free software; you can redistribute it and/or*
+# *   modify it under the terms of the GNU Lesser General Public            *
+# *   License as published by the Free Software Foundation; either          *
+# *   version 2.1 of the License, or (at your option) any later version.    *
+# *                                                                         *
+# *   This module is distributed in the hope that it will be useful,       *
+# *   but WITHOUT ANY WARRANTY; without even the implied warranty of        *
+# *   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU     *
+# *   Lesser General Public License for more details.                       *
+# *                                                                         *
+# *   You should have received a copy of the GNU Lesser General Public      *
+# *   License along with this library; if not, write to the Free Software   *
+# *   Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston,            *
+# *   MA  02110-1301  USA                                                   *
+# *                                                                         *
+# ***************************************************************************
+
+
+# Profile engine : parts are sheets of constant thickness and most tabs, slots, screw ways and
+# dog bones are prisms crossing the whole sheet. In that case the final part is the extrusion of
+# its section at the middle of the sheet, fused with the sections of the shapes to add and cut
+# by the sections of the shapes to remove. These 2D booleans on faces are much cheaper than the
+# 3D booleans on solids. When a part or a shape is not such a prism, fuse_cut_profiles returns
+# None and the part has to be made with 3D booleans.
+
+import FreeCAD
+import Part
+from lasercut import helper
+
+PROFILE_TOLERANCE = 10e-4
+
+
+def get_sheet_normal(shape):
+    biggest_face = None
+    for face in shape.Faces:
+        if isinstance(face.Surface, Part.Plane) and (biggest_face is None or face.Area > biggest_face.Area):
+            biggest_face = face
+    if biggest_face is None:
+        return None
+    return FreeCAD.Vector(biggest_face.normalAt(0, 0)).normalize()
+
+
+def is_parallel(vector, normal):
+    return vector.cross(normal).Length < PROFILE_TOLERANCE
+
+
+def is_perpendicular(vector, normal):
+    return abs(vector.dot(normal)) < PROFILE_TOLERANCE
+
+
+def is_at(position, expected):
+    return abs(position - expected) < PROFILE_TOLERANCE
+
+
+# Faces are planes parallel to the normal at the ends of the shape along the normal, or planes
+# perpendicular to the normal and cylinders along the normal spanning the whole shape. Pockets,
+# steps and counterbores are rejected, their section is not the same at every position.
+def is_prism(shape, normal):
+    low, high = helper.get_extent(shape, normal)
+    for face in shape.Faces:
+        surface = face.Surface
+        face_low, face_high = helper.get_extent(face, normal)
+        if isinstance(surface, Part.Plane) and is_parallel(face.normalAt(0, 0), normal):
+            if not is_at(face_high, face_low) or not (is_at(face_low, low) or is_at(face_low, high)):
+                return False
+        elif (isinstance(surface, Part.Plane) and is_perpendicular(face.normalAt(0, 0), normal)) \
+                or (isinstance(surface, Part.Cylinder) and is_parallel(surface.Axis, normal)):
+            if not is_at(face_low, low) or not is_at(face_high, high):
+                return False
+        else:
+            return False
+    return True
+
+
+def get_section(shape, normal, position):
+    wires = shape.slice(normal, position)
+    if len(wires) == 0:
+        return None
+    return Part.makeFace(wires, "Part::FaceMakerBullseye")
+
+
+def fuse_cut_profiles(shape, to_add, to_remove):
+    normal = get_sheet_normal(shape)
+    if normal is None or not is_prism(shape, normal):
+        return None
+    part_min, part_max = helper.get_extent(shape, normal)
+    middle = (part_min + part_max) / 2.0
+
+    add_faces = []
+    for tool in to_add:
+        # Added shapes must have the thickness of the sheet, else the part is not a sheet anymore
+        tool_min, tool_max = helper.get_extent(tool, normal)
+        if abs(tool_min - part_min) > PROFILE_TOLERANCE or abs(tool_max - part_max) > PROFILE_TOLERANCE \
+                or not is_prism(tool, normal):
+            return None
+        section = get_section(tool, normal, middle)
+        if section is None:
+            return None
+        add_faces.append(section)
+
+    remove_faces = []
+    for tool in to_remove:
+        tool_min, tool_max = helper.get_extent(tool, normal)
+        if tool_max < part_min + PROFILE_TOLERANCE or tool_min > part_max - PROFILE_TOLERANCE:
+            continue
+        # Removed shapes must cross the whole sheet
+        if tool_min > part_min + PROFILE_TOLERANCE or tool_max < part_max - PROFILE_TOLERANCE \
+                or not is_prism(tool, normal):
+            return None
+        section = get_section(tool, normal, middle)
+        if section is None:
+            return None
+        remove_faces.append(section)
+
+    profile = get_section(shape, normal, middle)
+    if profile is None:
+        return None
+    if len(add_faces) > 0:
+        profile = profile.multiFuse(add_faces)
+    if len(remove_faces) > 0:
+        profile = profile.cut(remove_faces)
+    faces = profile.removeSplitter().Faces
+    if len(faces) == 0:
+        return None
+    if len(faces) == 1:
+        profile = faces[0]
+    else:
+        profile = Part.makeCompound(faces)
+    profile.translate(normal * (part_min - middle))
+    return profile.extrude(normal * (part_max - part_min))
@@ -0,0 +1,160 @@
+#!/usr/bin/env python
+
+# ***************************************************************************
+# *                                                                         *
+# *   Copyright (c) 2016 execuc                                             *
+# *                                                                         *
+# *   This file is part of LCInterlocking module.                           *
+# *   LCInterlocking module is free software; you can redistribute it and/or*
+# *   modify it under the terms of the GNU Lesser General Public            *
+# *   License as published by the Free Software Foundation; either          *
+# *   version 2.1 of the License, or (at your option) any later version.    *
+# *                                                                         *
+# *   This module is distributed in the hope that it will be useful,       *
+# *   but WITHOUT ANY WARRANTY; without even the implied warranty of        *
+# *   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU     *
+# *   Lesser General Public License for more details.                       *
+# *                                                                         *
+# *   You should have received a copy of the GNU Lesser General Public      *
+# *   License along with this library; if not, write to the Free Software   *
+# *   Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston,            *
+# *   MA  02110-1301  USA                                                   *
+# *                                                                         *
+# ***************************************************************************
+
+
+# Cache of generated shapes on disk. Each shape is stored as a BREP file named by a key computed
+# from everything it is made of (source shapes fingerprints and properties), so the same files
+# can be shared by several documents and machines. The directory size is bounded, the least
+# recently used files are removed first.
+
+import os
+import FreeCAD
+import Part
+from lasercut import preferences, helper, instrumentation
+
+CACHE_EXTENSION = ".brep"
+
+# Hits, misses, stored and evicted shapes since FreeCAD started
+cache_stats = {'hits': 0, 'misses': 0, 'stores': 0, 'evictions': 0}
+instrumentation.register_counters("shape cache", cache_stats)
+
+
+def is_enabled():
+    return preferences.result_cache()
+
+
+def make_key(*values):
+    return helper.make_fingerprint(*values)
+
+
+def get_directory():
+    directory = preferences.result_cache_path()
+    if not os.path.isdir(directory):
+        os.makedirs(directory)
+    return directory
+
+
+def get_path(key):
+    return os.path.join(get_directory(), key + CACHE_EXTENSION)
+
+
+def load(key):
+    path = get_path(key)
+    if not os.path.isfile(path):
+        cache_stats['misses'] += 1
+        return None
+    shape = Part.Shape()
+    try:
+        shape.read(path)
+    except Exception as e:
+        FreeCAD.Console.PrintWarning("Invalid cached shape %s removed : %s\n" % (path, str(e)))
+        remove(path)
+        cache_stats['misses'] += 1
+        return None
+    # Modification time is the last use time for the eviction
+    try:
+        os.utime(path, None)
+    except OSError:
+        pass
+    cache_stats['hits'] += 1
+    return shape
+
+
+def store(key, shape):
+    path = get_path(key)
+    temp_path = "%s.%d.tmp" % (path, os.getpid())
+    try:
+        shape.exportBrep(temp_path)
+        os.replace(temp_path, path)
+    except (OSError, Part.OCCError) as e:
+        FreeCAD.Console.PrintWarning("Shape can not be cached in %s : %s\n" % (path, str(e)))
+        return
+    cache_stats['stores'] += 1
+
+
+# (modification time, size, path) of the cached shapes, least recently used first. The directory
+# can be shared with another FreeCAD, files removed meanwhile are skipped.
+def get_entries():
+    directory = get_directory()
+    entries = []
+    for name in os.listdir(directory):
+        if name.endswith(CACHE_EXTENSION):
+            path = os.path.join(directory, name)
+            try:
+                status = os.stat(path)
+            except OSError:
+                continue
+            entries.append((status.st_mtime, status.st_size, path))
+    entries.sort()
+    return entries
+
+
+def remove(path):
+    try:
+        os.remove(path)
+    except OSError:
+        return False
+    return True
+
+
+def evict():
+    max_size = preferences.result_cache_size() * 1024 * 1024
+    entries = get_entries()
+    total_size = sum([entry[1] for entry in entries])
+    for mtime, size, path in entries:
+        if total_size <= max_size:
+            break
+        total_size -= size
+        if remove(path):
+            cache_stats['evictions'] += 1
+
+
+def clear():
+    for mtime, size, path in get_entries():
+        remove(path)
+
+
+def get_stats():
+    entries = get_entries()
+    stats = dict(cache_stats)
+    stats['entries'] = len(entries)
+    stats['size'] = sum([entry[1] for entry in entries])
+    stats['directory'] = get_directory()
+    return stats
+
+
+# Shapes of the keys, loaded from the cache when present. The missing ones are built together by
+# build_shapes(indexes) which returns them in the order of the indexes, then they are stored and
+# the directory is bounded once.
+def get_shapes(keys, build_shapes):
+    if not is_enabled():
+        return build_shapes(list(range(len(keys))))
+    shapes = [load(key) for key in keys]
+    missing_indexes = [index for index, shape in enumerate(shapes) if shape is None]
+    if len(missing_indexes) > 0:
+        for index, shape in zip(missing_indexes, build_shapes(missing_indexes)):
+            store(keys[index], shape)
+            shapes[index] = shape
+        evict()
+    return shapes
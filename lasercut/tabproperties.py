@@ -37,7 +37,8 @@ class TabProperties(helper.ObjectProperties):
     _allowed = ('face_name', 'y_length', 'thickness', 'tabs_width', 'tabs_number', 'tabs_shift',
                 'dog_bone', 'tab_dog_bone', 'screw_diameter', 'screw_length', 'screw_length_tol', 'makeScrew',
                 'y_invert', 'half_tab_ratio', 'interval_ratio', 'freecad_obj_name',
-                'tab_type', 'group_id', 'description', 'link_name', 'tab_name', 'transform_matrix')
+                'tab_type', 'group_id', 'description', 'link_name', 'tab_name', 'transform_matrix',
+                'face_fingerprint')
 
     __count = 0
 
@@ -50,7 +51,6 @@ class TabProperties(helper.ObjectProperties):
         super(TabProperties, self).__init__(**kwargs)
         self.freecad_object = None
         self.freecad_face = None
-        self.transform_matrix = None
         if not kwargs['freecad_face']:
             raise ValueError("Must init with freecad face")
         if not hasattr(self, 'freecad_obj_name') :#or not hasattr(self, 'freecad_face'):
@@ -66,10 +66,9 @@ class TabProperties(helper.ObjectProperties):
             self.description = "%s.%s (%s)" % (self.freecad_obj_name, self.face_name, self.tab_type)
         if not hasattr(self, 'y_length') or not hasattr(self, 'thickness') or not hasattr(self, 'transform_matrix'):
             try:
-                x_local, y_length, thickness = helper.get_local_axis(kwargs['freecad_face'])
-                self.thickness = thickness.Length
-                self.y_length = y_length.Length
+                self.compute_local_frame(kwargs['freecad_face'])
             except ValueError as e:
+                self.transform_matrix = None
                 FreeCAD.Console.PrintError(e)
         if not hasattr(self, 'tabs_number'):
             self.tabs_number = 1
@@ -100,7 +99,20 @@ class TabProperties(helper.ObjectProperties):
     def recomputeInit(self, freecad_obj, freecad_face):
         self.freecad_object = freecad_obj
         self.freecad_face = freecad_face
+        # The matrix stored with the document is still valid if the face has not moved. Lengths are
+        # always taken from the face, the local axis are cached by helper.get_face_frame.
+        if getattr(self, 'transform_matrix', None) is None \
+                or getattr(self, 'face_fingerprint', None) != helper.face_fingerprint(freecad_face):
+            self.compute_local_frame(freecad_face)
+        else:
+            self.compute_local_lengths(freecad_face)
+
+    def compute_local_lengths(self, freecad_face):
         x_local, y_length, thickness = helper.get_local_axis(freecad_face)
         self.thickness = thickness.Length
         self.y_length = y_length.Length
-        self.transform_matrix = helper.get_matrix_transform(freecad_face)
\ No newline at end of file
+
+    def compute_local_frame(self, freecad_face):
+        self.compute_local_lengths(freecad_face)
+        self.transform_matrix = helper.matrix_to_tuple(helper.get_matrix_transform(freecad_face))
+        self.face_fingerprint = helper.face_fingerprint(freecad_face)
\ No newline at end of file
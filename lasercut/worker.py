@@ -0,0 +1,59 @@
+#!/usr/bin/env python
+
+# ***************************************************************************
+# *                                                                         *
+# *   Copyright (c) 2016 execuc                                             *
+# *                                                                         *
+# *   This file is part of LCInterlocking module.                           *
+# *   LCInterlocking module is free software; you can redistribute it and/or*
+# *   modify it under the terms of the GNU Lesser General Public            *
+# *   License as published by the Free Software Foundation; either          *
+# *   version 2.1 of the License, or (at your option) any later version.    *
+# *                                                                         *
+# *   This module is distributed in the hope that it will be useful,       *
+# *   but WITHOUT ANY WARRANTY; without even the implied warranty of        *
+# *   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU     *
+# *   Lesser General Public License for more details.                       *
+# *                                                                         *
+# *   You should have received a copy of the GNU Lesser General Public      *
+# *   License along with this library; if not, write to the Free Software   *
+# *   Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston,            *
+# *   MA  02110-1301  USA                                                   *
+# *                                                                         *
+# ***************************************************************************
+
+
+# Worker script run by FreeCADCmd for lasercut.workerpool. It runs every job of its batch and
+# writes the result, or the error, in the job directory.
+
+import os
+import sys
+import json
+import traceback
+
+sys.path.insert(0, os.environ.get("LCINTERLOCKING_PATH", os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from lasercut import workerpool
+
+
+def run_job(job_dir):
+    with open(os.path.join(job_dir, "function.txt")) as function_file:
+        function_name = function_file.read().strip()
+    arguments = workerpool.read_values(job_dir, "arguments.json")
+    result = workerpool.run_job_in_process(function_name, arguments)
+    workerpool.write_values(job_dir, "result.json", result)
+
+
+def main():
+    with open(os.environ[workerpool.BATCH_ENV]) as batch_file:
+        job_dirs = json.load(batch_file)
+    for job_dir in job_dirs:
+        try:
+            run_job(job_dir)
+        except Exception:
+            with open(os.path.join(job_dir, "error.txt"), "w") as error_file:
+                error_file.write(traceback.format_exc())
+
+
+if workerpool.BATCH_ENV in os.environ:
+    main()
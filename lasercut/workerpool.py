@@ -0,0 +1,200 @@
+#!/usr/bin/env python
+
+# ***************************************************************************
+# *                                                                         *
+# *   Copyright (c) 2016 execuc                                             *
+# *                                                                         *
+# *   This file is part of LCInterlocking module.                           *
+# *   LCInterlocking module is free software; you can redistribute it and/or*
+# *   modify it under the terms of the GNU Lesser General Public            *
+# *   License as published by the Free Software Foundation; either          *
+# *   version 2.1 of the License, or (at your option) any later version.    *
+# *                                                                         *
+# *   This module is distributed in the hope that it will be useful,       *
+# *   but WITHOUT ANY WARRANTY; without even the implied warranty of        *
+# *   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU     *
+# *   Lesser General Public License for more details.                       *
+# *                                                                         *
+# *   You should have received a copy of the GNU Lesser General Public      *
+# *   License along with this library; if not, write to the Free Software   *
+# *   Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston,            *
+# *   MA  02110-1301  USA                                                   *
+# *                                                                         *
+# ***************************************************************************
+
+
+# Pool of FreeCADCmd worker processes. A job is the name of a function importable by the worker
+# and its keyword arguments. Shapes and lists of shapes are exchanged as BREP files, other
+# arguments and results must be serializable in JSON. Jobs are split in as many batches as
+# workers and results are returned in the order of the jobs. Workers running longer than their
+# timeout are killed.
+
+import os
+import sys
+import json
+import time
+import shutil
+import importlib
+import tempfile
+import subprocess
+import FreeCAD
+import Part
+from lasercut import preferences
+
+WORKER_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "worker.py")
+MODULE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BATCH_ENV = "LCINTERLOCKING_BATCH"
+PATH_ENV = "LCINTERLOCKING_PATH"
+RESULT_KEY = "result"
+WORKER_FAILED_KEY = "worker_failed"
+
+
+def find_freecadcmd():
+    path = preferences.freecadcmd_path()
+    if path and os.path.isfile(path):
+        return path
+    directories = [os.path.join(FreeCAD.getHomePath(), "bin"), os.path.dirname(sys.executable)]
+    for directory in directories:
+        for name in ["FreeCADCmd", "freecadcmd", "FreeCADCmd.exe", "freecadcmd.exe"]:
+            candidate = os.path.join(directory, name)
+            if os.path.isfile(candidate):
+                return candidate
+    return shutil.which("FreeCADCmd") or shutil.which("freecadcmd")
+
+
+def is_available():
+    return find_freecadcmd() is not None
+
+
+def write_values(directory, file_name, values):
+    description = {}
+    for name, value in values.items():
+        if isinstance(value, Part.Shape):
+            value.exportBrep(os.path.join(directory, name + ".brep"))
+            description[name] = {'type': 'shape'}
+        elif isinstance(value, (list, tuple)) and len(value) > 0 and isinstance(value[0], Part.Shape):
+            Part.makeCompound(list(value)).exportBrep(os.path.join(directory, name + ".brep"))
+            description[name] = {'type': 'shape_list'}
+        else:
+            description[name] = {'type': 'json', 'value': value}
+    with open(os.path.join(directory, file_name), "w") as json_file:
+        json.dump(description, json_file)
+
+
+def read_values(directory, file_name):
+    with open(os.path.join(directory, file_name)) as json_file:
+        description = json.load(json_file)
+    values = {}
+    for name, item in description.items():
+        if item['type'] == 'json':
+            values[name] = item['value']
+            continue
+        shape = Part.Shape()
+        shape.read(os.path.join(directory, name + ".brep"))
+        if item['type'] == 'shape_list':
+            values[name] = shape.childShapes()
+        else:
+            values[name] = shape
+    return values
+
+
+def write_job(directory, function_name, arguments):
+    os.makedirs(directory)
+    with open(os.path.join(directory, "function.txt"), "w") as function_file:
+        function_file.write(function_name)
+    write_values(directory, "arguments.json", arguments)
+
+
+# A job without result because its worker crashed or was killed gets a WORKER_FAILED_KEY entry
+def read_result(directory, worker_log):
+    error_path = os.path.join(directory, "error.txt")
+    if os.path.isfile(error_path):
+        with open(error_path) as error_file:
+            return {'error': error_file.read()}
+    try:
+        return read_values(directory, "result.json")
+    except (OSError, ValueError):
+        return {'error': "Worker process failed :\n%s" % worker_log[-2000:], WORKER_FAILED_KEY: True}
+
+
+# Runs a job in this process, a result which is not a dictionary is stored under RESULT_KEY
+def run_job_in_process(function_name, arguments):
+    module_name, name = function_name.rsplit(".", 1)
+    result = getattr(importlib.import_module(module_name), name)(**arguments)
+    if not isinstance(result, dict):
+        result = {RESULT_KEY: result}
+    return result
+
+
+# Waits for a worker until its deadline and kills it when it is reached. Returns the message
+# added to its log.
+def wait_worker(process, deadline):
+    try:
+        process.wait(timeout=None if deadline is None else max(0., deadline - time.monotonic()))
+    except subprocess.TimeoutExpired:
+        process.kill()
+        process.wait()
+        return "\nWorker process killed, timeout reached"
+    return ""
+
+
+# Returns a list of dictionaries, one by job. A failed job gets an 'error' entry. timeout is the
+# maximum time in seconds of a job, None for the WorkerTimeout parameter and 0 for no limit.
+def run_jobs(jobs, nb_workers=None, timeout=None):
+    freecadcmd = find_freecadcmd()
+    if freecadcmd is None:
+        raise ValueError("FreeCADCmd executable not found")
+    if nb_workers is None:
+        nb_workers = preferences.parallel_workers()
+    if timeout is None:
+        timeout = preferences.worker_timeout()
+    nb_workers = max(1, min(nb_workers, len(jobs)))
+
+    work_dir = tempfile.mkdtemp(prefix="lcinterlocking_")
+    try:
+        job_dirs = []
+        for index, (function_name, arguments) in enumerate(jobs):
+            job_dir = os.path.join(work_dir, "job_%d" % index)
+            write_job(job_dir, function_name, arguments)
+            job_dirs.append(job_dir)
+
+        processes = []
+        start = time.monotonic()
+        for worker_index in range(nb_workers):
+            batch_path = os.path.join(work_dir, "batch_%d.json" % worker_index)
+            batch_dirs = job_dirs[worker_index::nb_workers]
+            with open(batch_path, "w") as batch_file:
+                json.dump(batch_dirs, batch_file)
+            deadline = start + timeout * len(batch_dirs) if timeout > 0 else None
+            env = dict(os.environ)
+            env[BATCH_ENV] = batch_path
+            env[PATH_ENV] = MODULE_DIR
+            log_path = os.path.join(work_dir, "worker_%d.log" % worker_index)
+            with open(log_path, "w") as log_file:
+                process = subprocess.Popen([freecadcmd, WORKER_SCRIPT], env=env, stdin=subprocess.DEVNULL,
+                                           stdout=log_file, stderr=subprocess.STDOUT)
+            processes.append((process, log_path, deadline))
+
+        worker_logs = []
+        for process, log_path, deadline in processes:
+            status = wait_worker(process, deadline)
+            with open(log_path) as log_file:
+                worker_logs.append(log_file.read() + status)
+
+        return [read_result(job_dir, worker_logs[index % nb_workers]) for index, job_dir in enumerate(job_dirs)]
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+# Same as run_jobs but raises the first error. The jobs of a crashed or killed worker are run
+# again in this process.
+def run_jobs_or_raise(jobs, nb_workers=None, timeout=None):
+    results = run_jobs(jobs, nb_workers, timeout)
+    for index, result in enumerate(results):
+        if result.get(WORKER_FAILED_KEY):
+            FreeCAD.Console.PrintWarning("%s\nJob %s is run again in this process\n"
+                                         % (result['error'], jobs[index][0]))
+            results[index] = run_job_in_process(*jobs[index])
+        elif 'error' in result:
+            raise ValueError(result['error'])
+    return results
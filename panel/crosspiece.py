@@ -26,7 +26,9 @@ import FreeCAD
 import FreeCADGui
 from FreeCAD import Gui, Matrix
 import os
-from lasercut.crosspart import make_cross_parts
+from lasercut.crosspart import make_cross_parts, get_parts_result_keys
+from lasercut import shapecache, instrumentation
+from lasercut.helper import get_elements_shapes
 from panel.treepanel import TreePanel, PREVIEW_NONE, PREVIEW_NORMAL, PREVIEW_FAST
 from panel.propertieslist import PropertiesList
 import json
@@ -108,53 +110,65 @@ class CrossPieceGroup:
     def execute(self, fp):
         if fp.need_recompute:
             fp.need_recompute = False
-
-            document = fp.Document
-            if len(fp.fromParts) > 0:
-                groupObj = fp.fromParts[0]
-            else:
-                groupObj = document.addObject("App::DocumentObjectGroup", str(fp.Name) + "_origin_parts")
-
-            subObjectList = groupObj.Group
-            for subObj in subObjectList:
-                groupObj.removeObject(subObj)
-
-            fp.fromParts = []
-            parts = []
-            freedac_origin_obj = []
-            freedac_origin_obj.append(groupObj)
-            for part in fp.parts.lst:
-                cp_part = copy.deepcopy(part)
-                freecad_obj = document.getObject(cp_part.name)
-                freedac_origin_obj.append(freecad_obj)
-                cp_part.recomputeInit(freecad_obj)
-                groupObj.addObject(freecad_obj)
-                parts.append(cp_part)
-
-            fp.fromParts = freedac_origin_obj
-            computed_parts = make_cross_parts(parts)
-
-            previous_nameMapping = copy.copy(fp.namesMapping)
-            fp.namesMapping.clear()
-
-            freecad_obj_generated = []
-            freecad_objname_tokeep = []
-            for part in computed_parts:
-                if part.get_new_name() in previous_nameMapping:
-                    freecad_obj = document.getObject(previous_nameMapping[part.get_new_name()])
+            instrumentation.start()
+            try:
+                document = fp.Document
+                if len(fp.fromParts) > 0:
+                    groupObj = fp.fromParts[0]
                 else:
-                    freecad_obj = document.addObject("Part::Feature", part.get_new_name())
-                fp.namesMapping[part.get_new_name()] = freecad_obj.Name
-                freecad_obj.Shape = part.get_shape()
-                freecad_objname_tokeep.append(freecad_obj.Name)
-                freecad_obj_generated.append(freecad_obj)
-
-            for part in fp.generatedParts:
-                if part.Name not in freecad_objname_tokeep:
-                    document.removeObject(part.Name)
-
-            fp.generatedParts = freecad_obj_generated
-            fp.edit = False
+                    groupObj = document.addObject("App::DocumentObjectGroup", str(fp.Name) + "_origin_parts")
+
+                subObjectList = groupObj.Group
+                for subObj in subObjectList:
+                    groupObj.removeObject(subObj)
+
+                fp.fromParts = []
+                parts = []
+                freedac_origin_obj = []
+                freedac_origin_obj.append(groupObj)
+                for part in fp.parts.lst:
+                    cp_part = copy.deepcopy(part)
+                    freecad_obj = document.getObject(cp_part.name)
+                    freedac_origin_obj.append(freecad_obj)
+                    cp_part.recomputeInit(freecad_obj)
+                    groupObj.addObject(freecad_obj)
+                    parts.append(cp_part)
+
+                fp.fromParts = freedac_origin_obj
+                result_keys = get_parts_result_keys(parts)
+                cross_parts = []
+
+                # Cross parts are only made when a shape is missing from the shape cache
+                def build_shapes(indexes):
+                    if len(cross_parts) == 0:
+                        cross_parts.extend(make_cross_parts(parts))
+                    return get_elements_shapes([cross_parts[index] for index in indexes])
+
+                computed_shapes = shapecache.get_shapes(result_keys, build_shapes)
+
+                previous_nameMapping = copy.copy(fp.namesMapping)
+                fp.namesMapping.clear()
+
+                freecad_obj_generated = []
+                freecad_objname_tokeep = []
+                for part, shape in zip(parts, computed_shapes):
+                    if part.new_name in previous_nameMapping:
+                        freecad_obj = document.getObject(previous_nameMapping[part.new_name])
+                    else:
+                        freecad_obj = document.addObject("Part::Feature", part.new_name)
+                    fp.namesMapping[part.new_name] = freecad_obj.Name
+                    freecad_obj.Shape = shape
+                    freecad_objname_tokeep.append(freecad_obj.Name)
+                    freecad_obj_generated.append(freecad_obj)
+
+                for part in fp.generatedParts:
+                    if part.Name not in freecad_objname_tokeep:
+                        document.removeObject(part.Name)
+
+                fp.generatedParts = freecad_obj_generated
+                fp.edit = False
+            finally:
+                instrumentation.finish()
 
             FreeCADGui.getDocument(document.Name).ActiveView.fitAll()
             document.recompute()
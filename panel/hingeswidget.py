@@ -50,7 +50,9 @@ class GlobalLivingHingeWidget(ParamWidget):
                                              widget=None, interval_value=[0., 30.], decimals=4, step=0.05),
                                  WidgetValue(type=float, name="laser_beam_diameter", show_name="Laser beam diameter",
                                              widget=None, interval_value=[0., 30.], decimals=4, step=0.05),
-                                 WidgetValue(type=bool, name="generate_solid", show_name="Generate solid", widget=None)])
+                                 WidgetValue(type=bool, name="generate_solid", show_name="Generate solid", widget=None),
+                                 WidgetValue(type=bool, name="generate_pattern", show_name="Generate 2D pattern",
+                                             widget=None)])
 
 
 class LivingHingeWidget(ParamWidget):
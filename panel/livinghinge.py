@@ -32,7 +32,8 @@ import copy
 
 from panel.hingeswidget import GlobalLivingHingeWidget, LivingHingeWidget
 from panel import selection
-from lasercut.makehinges import create_linked_part
+from lasercut.makehinges import create_linked_part, get_hinges_result_key, PATTERN_PROPERTY
+from lasercut import shapecache
 from panel.propertieslist import PropertiesList
 from lasercut.hingesproperties import GlobalLivingMaterialProperties, HingesProperties
 
@@ -52,6 +53,9 @@ class LivingHingesPanel:
         self.hinges_origin = copy.deepcopy(obj.hinges)
 
         self.global_properties = obj.globalProperties
+        # Documents made before the 2D pattern option
+        if not hasattr(self.global_properties, 'generate_pattern'):
+            self.global_properties.generate_pattern = False
         self.global_properties_widget = GlobalLivingHingeWidget(self.global_properties)
         self.hinges = obj.hinges
 
@@ -220,16 +224,37 @@ class LivingHinges:
             hinges_lst = []
             for hinge in fp.hinges.lst:
                 cp_hinge = copy.deepcopy(hinge)
-                freecad_obj_1 = document.getObject(cp_hinge.freecad_object_1_name)
-                freecad_obj_2 = document.getObject(cp_hinge.freecad_object_2_name)
-                freecad_face_1 = freecad_obj_1.Shape.getElement(cp_hinge.freecad_face_1_name)
-                freecad_face_2 = freecad_obj_2.Shape.getElement(cp_hinge.freecad_face_2_name)
-                cp_hinge.recomputeInit(freecad_obj_1, freecad_face_1, freecad_obj_2, freecad_face_2)
+                cp_hinge.freecad_object_1 = document.getObject(cp_hinge.freecad_object_1_name)
+                cp_hinge.freecad_object_2 = document.getObject(cp_hinge.freecad_object_2_name)
                 hinges_lst.append(cp_hinge)
 
-            flat_part, solid_part=create_linked_part(hinges_lst, global_prop)
+            # Shapes made by create_linked_part : flat part, solid and 2D pattern
+            generate_pattern = getattr(global_prop, 'generate_pattern', False)
+            result_indexes = [0]
+            if global_prop.generate_solid is True:
+                result_indexes.append(1)
+            if generate_pattern:
+                result_indexes.append(2)
+
+            # Hinges are only completed and made when a shape is missing from the shape cache
+            def build_shapes(indexes):
+                for cp_hinge in hinges_lst:
+                    freecad_obj_1 = cp_hinge.freecad_object_1
+                    freecad_obj_2 = cp_hinge.freecad_object_2
+                    freecad_face_1 = freecad_obj_1.Shape.getElement(cp_hinge.freecad_face_1_name)
+                    freecad_face_2 = freecad_obj_2.Shape.getElement(cp_hinge.freecad_face_2_name)
+                    cp_hinge.recomputeInit(freecad_obj_1, freecad_face_1, freecad_obj_2, freecad_face_2)
+                shapes = create_linked_part(hinges_lst, global_prop)
+                return [shapes[result_indexes[index]] for index in indexes]
+
+            result_key = get_hinges_result_key(hinges_lst, global_prop)
+            result_names = ["flat", "solid", "pattern"]
+            result_keys = [shapecache.make_key(result_key, result_names[index]) for index in result_indexes]
+            result_shapes = dict(zip(result_indexes, shapecache.get_shapes(result_keys, build_shapes)))
+            flat_part = result_shapes[0]
 
             if global_prop.generate_solid is True:
+                solid_part = result_shapes[1]
                 if fp.solid is None:
                     fp.solid = document.addObject("Part::Feature", global_prop.solid_name)
                 fp.solid.Shape = solid_part
@@ -243,6 +268,14 @@ class LivingHinges:
                 fp.obj = document.addObject("Part::Feature", global_prop.new_name)
             fp.obj.Shape = flat_part
             fp.obj.Label = global_prop.new_name
+            # The 2D pattern is attached to the flat part, the export uses it instead of projecting the part
+            if generate_pattern:
+                if not hasattr(fp.obj, PATTERN_PROPERTY):
+                    fp.obj.addProperty("Part::PropertyPartShape", PATTERN_PROPERTY, "LCInterlocking",
+                                       "2D outlines of the part and of its hinges slots")
+                setattr(fp.obj, PATTERN_PROPERTY, result_shapes[2])
+            elif hasattr(fp.obj, PATTERN_PROPERTY):
+                fp.obj.removeProperty(PATTERN_PROPERTY)
 
             document.recompute()
 
@@ -26,7 +26,9 @@ import FreeCAD
 import FreeCADGui
 from FreeCAD import Gui, Matrix
 import os
-from lasercut.join import make_tabs_joins
+from lasercut.join import make_tabs_joins, make_tabs_joins_incremental, get_parts_result_keys
+from lasercut import shapecache, instrumentation
+from lasercut.helper import get_elements_shapes
 from panel.treepanel import TreePanel, PREVIEW_NONE, PREVIEW_NORMAL, PREVIEW_FAST
 from panel.propertieslist import PropertiesList
 import json
@@ -46,6 +48,7 @@ class MultipleJoinGroup:
         obj.addProperty('App::PropertyLinkList', 'fromParts').fromParts = []
         obj.addProperty('App::PropertyPythonObject', 'edit').edit = False
         obj.addProperty('App::PropertyPythonObject', 'namesMapping').namesMapping = {}
+        obj.addProperty('App::PropertyPythonObject', 'fingerprints').fingerprints = {}
         obj.Proxy = self
 
     def onChanged(self, fp, prop):
@@ -118,62 +121,88 @@ class MultipleJoinGroup:
     def execute(self, fp):
         if fp.need_recompute:
             fp.need_recompute = False
-
-            document = fp.Document
-            if len(fp.fromParts) > 0:
-                groupObj = fp.fromParts[0]
-            else:
-                groupObj = document.addObject("App::DocumentObjectGroup", str(fp.Name) + "_origin_parts")
-
-            subObjectList = groupObj.Group
-            for subObj in subObjectList:
-                groupObj.removeObject(subObj)
-
-            fp.fromParts = []
-            parts = []
-            freedac_origin_obj = []
-            freedac_origin_obj.append(groupObj)
-            for part in fp.parts.lst:
-                cp_part = copy.deepcopy(part)
-                freecad_obj = document.getObject(cp_part.name)
-                freedac_origin_obj.append(freecad_obj)
-                cp_part.recomputeInit(freecad_obj)
-                groupObj.addObject(freecad_obj)
-                parts.append(cp_part)
-
-            fp.fromParts = freedac_origin_obj
-
-            tabs = []
-            for tab in fp.faces.lst:
-                cp_tab = copy.deepcopy(tab)
-                freecad_obj = document.getObject(cp_tab.freecad_obj_name)
-                freecad_face = document.getObject(cp_tab.freecad_obj_name).Shape.getElement(cp_tab.face_name)
-                cp_tab.recomputeInit(freecad_obj, freecad_face)
-                tabs.append(cp_tab)
-
-            computed_parts = make_tabs_joins(parts, tabs)
-
-            previous_nameMapping = copy.copy(fp.namesMapping)
-            fp.namesMapping.clear()
-
-            freecad_obj_generated = []
-            freecad_objname_tokeep = []
-            for part in computed_parts:
-                if part.get_new_name() in previous_nameMapping:
-                    freecad_obj = document.getObject(previous_nameMapping[part.get_new_name()])
+            instrumentation.start()
+            try:
+                document = fp.Document
+                if len(fp.fromParts) > 0:
+                    groupObj = fp.fromParts[0]
                 else:
-                    freecad_obj = document.addObject("Part::Feature", part.get_new_name())
-                fp.namesMapping[part.get_new_name()] = freecad_obj.Name
-                freecad_obj.Shape = part.get_shape()
-                freecad_objname_tokeep.append(freecad_obj.Name)
-                freecad_obj_generated.append(freecad_obj)
-
-            for part in fp.generatedParts:
-                if part.Name not in freecad_objname_tokeep:
-                    document.removeObject(part.Name)
-
-            fp.generatedParts = freecad_obj_generated
-            fp.edit = False
+                    groupObj = document.addObject("App::DocumentObjectGroup", str(fp.Name) + "_origin_parts")
+
+                subObjectList = groupObj.Group
+                for subObj in subObjectList:
+                    groupObj.removeObject(subObj)
+
+                fp.fromParts = []
+                parts = []
+                freedac_origin_obj = []
+                freedac_origin_obj.append(groupObj)
+                for part in fp.parts.lst:
+                    cp_part = copy.deepcopy(part)
+                    freecad_obj = document.getObject(cp_part.name)
+                    freedac_origin_obj.append(freecad_obj)
+                    cp_part.recomputeInit(freecad_obj)
+                    groupObj.addObject(freecad_obj)
+                    parts.append(cp_part)
+
+                fp.fromParts = freedac_origin_obj
+
+                tabs = []
+                for tab in fp.faces.lst:
+                    cp_tab = copy.deepcopy(tab)
+                    freecad_obj = document.getObject(cp_tab.freecad_obj_name)
+                    freecad_face = document.getObject(cp_tab.freecad_obj_name).Shape.getElement(cp_tab.face_name)
+                    cp_tab.recomputeInit(freecad_obj, freecad_face)
+                    # Keep the local frame with the document, so it is not derived again when reopened
+                    tab.transform_matrix = cp_tab.transform_matrix
+                    tab.face_fingerprint = cp_tab.face_fingerprint
+                    tab.thickness = cp_tab.thickness
+                    tab.y_length = cp_tab.y_length
+                    tabs.append(cp_tab)
+
+                previous_nameMapping = copy.copy(fp.namesMapping)
+                fp.namesMapping.clear()
+
+                # Only the parts whose joins changed are rebuilt, the others keep their generated shape
+                if not hasattr(fp, 'fingerprints'):
+                    fp.addProperty('App::PropertyPythonObject', 'fingerprints').fingerprints = {}
+                available_parts = set()
+                for part in parts:
+                    if part.new_name in previous_nameMapping \
+                            and document.getObject(previous_nameMapping[part.new_name]) is not None:
+                        available_parts.add(part.name)
+                computed_parts, dirty_parts, fp.fingerprints = make_tabs_joins_incremental(parts, tabs,
+                                                                                           fp.fingerprints,
+                                                                                           available_parts)
+
+                rebuilt_parts = [part for part in computed_parts if part.get_name() in dirty_parts]
+                result_keys = get_parts_result_keys(fp.fingerprints)
+                rebuilt_shapes = shapecache.get_shapes([result_keys[part.get_name()] for part in rebuilt_parts],
+                                                       lambda indexes: get_elements_shapes([rebuilt_parts[index]
+                                                                                            for index in indexes]))
+                computed_shapes = dict(zip([part.get_name() for part in rebuilt_parts], rebuilt_shapes))
+                freecad_obj_generated = []
+                freecad_objname_tokeep = []
+                for part in computed_parts:
+                    freecad_obj = None
+                    if part.get_new_name() in previous_nameMapping:
+                        freecad_obj = document.getObject(previous_nameMapping[part.get_new_name()])
+                    if freecad_obj is None:
+                        freecad_obj = document.addObject("Part::Feature", part.get_new_name())
+                    fp.namesMapping[part.get_new_name()] = freecad_obj.Name
+                    if part.get_name() in computed_shapes:
+                        freecad_obj.Shape = computed_shapes[part.get_name()]
+                    freecad_objname_tokeep.append(freecad_obj.Name)
+                    freecad_obj_generated.append(freecad_obj)
+
+                for part in fp.generatedParts:
+                    if part.Name not in freecad_objname_tokeep:
+                        document.removeObject(part.Name)
+
+                fp.generatedParts = freecad_obj_generated
+                fp.edit = False
+            finally:
+                instrumentation.finish()
 
             FreeCADGui.getDocument(document.Name).ActiveView.fitAll()
             document.recompute()
@@ -0,0 +1,73 @@
+#!/usr/bin/env python
+
+# ***************************************************************************
+# *                                                                         *
+# *   Copyright (c) 2016 execuc                                             *
+# *                                                                         *
+# *   This file is part of LCInterlocking module.                           *
+# *   LCInterlocking module is free software; you can redistribute it and/or*
+# *   modify it under the terms of the GNU Lesser General Public            *
+# *   License as published by the Free Software Foundation; either          *
+# *   version 2.1 of the License, or (at your option) any later version.    *
+# *                                                                         *
+# *   This module is distributed in the hope that it will be useful,       *
+# *   but WITHOUT ANY WARRANTY; without even the implied warranty of        *
+# *   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU     *
+# *   Lesser General Public License for more details.                       *
+# *                                                                         *
+# *   You should have received a copy of the GNU Lesser General Public      *
+# *   License along with this library; if not, write to the Free Software   *
+# *   Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston,            *
+# *   MA  02110-1301  USA                                                   *
+# *                                                                         *
+# ***************************************************************************
+
+
+import FreeCAD
+from FreeCAD import Gui
+from lasercut import shapecache
+
+
+class ResultCacheStatsCommand:
+
+    def __init__(self):
+        return
+
+    def GetResources(self):
+        return {'MenuText': "Shape cache statistics",
+                'ToolTip': "Print the statistics of the generated shapes cache in the report view"}
+
+    def IsActive(self):
+        return True
+
+    def Activated(self):
+        if not shapecache.is_enabled():
+            FreeCAD.Console.PrintMessage("Shape cache is disabled, enable the ResultCache parameter "
+                                         "of BaseApp/Preferences/Mod/LCInterlocking\n")
+        stats = shapecache.get_stats()
+        FreeCAD.Console.PrintMessage("Shape cache %s : %d shapes, %.1f MB\n"
+                                     % (stats['directory'], stats['entries'], stats['size'] / (1024. * 1024.)))
+        FreeCAD.Console.PrintMessage("Hits : %d, misses : %d, stored : %d, evicted : %d\n"
+                                     % (stats['hits'], stats['misses'], stats['stores'], stats['evictions']))
+        return
+
+
+class ResultCacheClearCommand:
+
+    def __init__(self):
+        return
+
+    def GetResources(self):
+        return {'MenuText': "Clear shape cache",
+                'ToolTip': "Remove all the generated shapes from the cache directory"}
+
+    def IsActive(self):
+        return True
+
+    def Activated(self):
+        shapecache.clear()
+        FreeCAD.Console.PrintMessage("Shape cache cleared\n")
+        return
+
+Gui.addCommand('result_cache_stats_command', ResultCacheStatsCommand())
+Gui.addCommand('result_cache_clear_command', ResultCacheClearCommand())
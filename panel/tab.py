@@ -250,6 +250,7 @@ class TabsList(object):
                 new_tab.freecad_obj_name = tab.freecad_obj_name
                 new_tab.y_invert = tab.y_invert
                 new_tab.transform_matrix = tab.transform_matrix
+                new_tab.face_fingerprint = getattr(tab, 'face_fingerprint', None)
                 new_tab.thickness = tab.thickness
                 new_tab.y_length = tab.y_length
 